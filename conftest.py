@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The bot is a set of flat scripts in src/ that import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+import punch_journal
+import run_metrics
+import session_cache
+
+
+@pytest.fixture
+def isolated_files(tmp_path, monkeypatch):
+    """Keeps metrics, the punch journal and the session cache of a test out of the working copy."""
+    monkeypatch.setattr(run_metrics, "METRICS_FILE", str(tmp_path / "metrics.jsonl"))
+    monkeypatch.setattr(run_metrics, "PROM_TEXTFILE_DIR", None)
+    monkeypatch.setattr(punch_journal, "JOURNAL_FILE", str(tmp_path / "journal.jsonl"))
+    monkeypatch.setattr(session_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path
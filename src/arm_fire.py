@@ -0,0 +1,115 @@
+import os
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import bixpe_bot
+import readiness
+
+# Arm-and-fire: launch, login and dashboard readiness happen BEFORE the scheduled minute,
+# the staged page is held (and kept alive) and the click goes out at the exact timestamp.
+
+# Staging starts this long before the target (an earlier trigger sleeps first, without a browser)
+DEFAULT_LEAD_SECONDS = float(os.environ.get("BIXPE_ARM_LEAD_SECONDS", "120"))
+# Reload the dashboard this often while holding so the session does not go stale
+KEEPALIVE_SECONDS = float(os.environ.get("BIXPE_ARM_KEEPALIVE_SECONDS", "120"))
+# No reloads this close to the target: the page must be settled when it fires
+QUIET_SECONDS = 20
+# A trigger further ahead than this gives up instead of holding a runner for hours
+MAX_WAIT_MINUTES = float(os.environ.get("BIXPE_ARM_MAX_WAIT_MINUTES", "30"))
+
+
+class ArmError(Exception):
+    """The run can't be armed for this target (too far ahead)."""
+
+
+def target_time(hhmm, timezone_name, now=None):
+    """"HH:MM" today in timezone_name as an aware datetime."""
+    tz = ZoneInfo(timezone_name)
+    now = now or datetime.now(tz)
+    hour, minute = (int(part) for part in hhmm.split(":"))
+    return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def sleep_until(timestamp):
+    """Sleeps until time.time() reaches timestamp (chunks of at most 60 s follow clock adjustments)."""
+    while True:
+        remaining = timestamp - time.time()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 60))
+
+
+def wait_for_lead(target, lead_seconds=DEFAULT_LEAD_SECONDS):
+    """Called before launching: sleeps until lead_seconds before target. Raises ArmError if too early."""
+    ahead = target.timestamp() - time.time()
+    if ahead > MAX_WAIT_MINUTES * 60:
+        raise ArmError(f"{target:%H:%M} is {ahead / 60:.0f} min away (limit BIXPE_ARM_MAX_WAIT_MINUTES="
+                       f"{MAX_WAIT_MINUTES:.0f})")
+    if ahead <= 0:
+        print(f"[Arm] Target {target:%H:%M:%S} already passed ({-ahead:.0f}s ago); firing as soon as staged.")
+        return
+    if ahead > lead_seconds:
+        print(f"[Arm] Target {target:%H:%M:%S}; staging starts in {ahead - lead_seconds:.0f}s (lead {lead_seconds:.0f}s).")
+        sleep_until(target.timestamp() - lead_seconds)
+    else:
+        print(f"[Arm] Target {target:%H:%M:%S}; staging now ({ahead:.0f}s ahead).")
+
+
+def stage_once(session, action):
+    """Waits until the dashboard settles for action. Returns "ready" or "hidden" (already done)."""
+    selectors = [sel for sels in bixpe_bot.ACTION_SELECTORS.values() for sel in sels]
+    with session.metrics.measure("arm_staging"):
+        return readiness.wait_for_action_ready(session.page, bixpe_bot.ACTION_SELECTORS[action][0], selectors,
+                                               timeout=30000)
+
+
+def arm(session, action, target, engine):
+    """Stages the authenticated page for action and holds until target.
+
+    Returns as close to target as possible (at once if it already passed or the button is
+    hidden, so perform_action can report ALREADY_DONE). Raises when the retry engine gives
+    up on staging or on a keepalive, i.e. when the page is not ready by the deadline.
+    """
+    extra = session.metrics.extra
+    get_page = lambda: session.page
+    state = engine.run("stage", lambda: stage_once(session, action), session.recover_for_action, get_page=get_page)
+    slack = target.timestamp() - time.time()
+    extra["arm_slack_seconds"] = round(slack, 3)
+    if state == "hidden":
+        print(f"[Arm] {action} button not offered while staging; not holding.")
+        return
+    if slack <= 0:
+        print(f"[Arm] Staged {-slack:.1f}s AFTER the target; firing now.")
+        return
+    print(f"[Arm] Staged {slack:.1f}s before {target:%H:%M:%S}; holding.")
+
+    keepalives = 0
+    next_refresh = time.time() + KEEPALIVE_SECONDS
+    while next_refresh < target.timestamp() - QUIET_SECONDS:
+        sleep_until(next_refresh)
+
+        def keepalive():
+            session.refresh()
+            return stage_once(session, action)
+
+        state = engine.run("keepalive", keepalive, session.recover_for_action, get_page=get_page)
+        keepalives += 1
+        extra["arm_keepalives"] = keepalives
+        if state == "hidden":
+            print(f"[Arm] {action} button disappeared while holding; not waiting for the target.")
+            return
+        next_refresh = time.time() + KEEPALIVE_SECONDS
+    sleep_until(target.timestamp())
+
+
+def report(metrics, target, fired_at):
+    """Prints and stores the skew between the target and the actual fire/click times."""
+    fire_skew = fired_at - target.timestamp()
+    metrics.extra["fire_skew_seconds"] = round(fire_skew, 3)
+    line = f"[Arm] Scheduled {target:%H:%M:%S} | fired {fire_skew:+.3f}s"
+    clicked_at = metrics.extra.get("clicked_at")
+    if clicked_at:
+        metrics.extra["click_skew_seconds"] = round(clicked_at - target.timestamp(), 3)
+        line += f" | clicked {metrics.extra['click_skew_seconds']:+.3f}s"
+    print(line)
@@ -0,0 +1,205 @@
+import os
+import gzip
+import time
+import queue
+import atexit
+import threading
+
+# Debug artifacts (screenshots, HTML snapshots, traces) by level:
+#   none        nothing is captured
+#   on-failure  only failure paths capture (default): the success path ends at the confirmed punch
+#   always      successful punches also keep a screenshot
+LEVELS = ("none", "on-failure", "always")
+# Read at call time, so --artifacts can switch them for the whole run
+LEVEL = os.environ.get("BIXPE_ARTIFACTS", "on-failure")
+ARTIFACTS_DIR = os.environ.get("BIXPE_ARTIFACTS_DIR", "artifacts")
+# Playwright trace of the whole run, kept only when it fails (costs CPU/RAM while recording)
+TRACE = os.environ.get("BIXPE_ARTIFACTS_TRACE", "").lower() in ("1", "true", "yes")
+# Ring buffer: the oldest files go once either limit is exceeded
+MAX_FILES = int(os.environ.get("BIXPE_ARTIFACTS_MAX_FILES", "40"))
+MAX_BYTES = int(float(os.environ.get("BIXPE_ARTIFACTS_MAX_MB", "50")) * 1024 * 1024)
+
+JPEG_QUALITY = 60
+CLIP_PADDING = 40
+
+# Bounding box of the clock widget: the visible action buttons and the processing overlay
+WIDGET_BOX_JS = """([selectors, padding]) => {
+    const rects = selectors.map(sel => document.querySelector(sel)).filter(el => el).map(el => el.getBoundingClientRect())
+        .filter(r => r.width > 0 && r.height > 0);
+    if (!rects.length) return null;
+    const left = Math.max(0, Math.min(...rects.map(r => r.left)) - padding);
+    const top = Math.max(0, Math.min(...rects.map(r => r.top)) - padding);
+    const right = Math.min(window.innerWidth, Math.max(...rects.map(r => r.right)) + padding);
+    const bottom = Math.min(window.innerHeight, Math.max(...rects.map(r => r.bottom)) + padding);
+    return {x: left, y: top, width: right - left, height: bottom - top};
+}"""
+
+
+class ArtifactWriter(threading.Thread):
+    """Compresses and writes queued artifacts off the hot path, then applies the retention limits."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.queue = queue.Queue()
+
+    def submit(self, path, data, compress=False):
+        self.queue.put((path, data, compress))
+
+    def run(self):
+        while True:
+            path, data, compress = self.queue.get()
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                if compress:
+                    data = gzip.compress(data, compresslevel=6)
+                with open(path, "wb") as f:
+                    f.write(data)
+                enforce_retention(os.path.dirname(path) or ".")
+            except Exception as e:
+                print(f"[Artifacts] Could not write {path}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def flush(self, timeout=10):
+        """Waits (bounded) until everything queued is on disk."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+
+_writer = None
+
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        _writer = ArtifactWriter()
+        _writer.start()
+        atexit.register(_writer.flush)  # sys.exit() must not drop queued failure artifacts
+    return _writer
+
+
+def flush(timeout=10):
+    if _writer:
+        _writer.flush(timeout)
+
+
+def enforce_retention(directory, max_files=None, max_bytes=None):
+    """Deletes the oldest files in directory until both limits hold. Returns the deleted paths."""
+    max_files = MAX_FILES if max_files is None else max_files
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    files = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    deleted = []
+    while files and (len(files) > max_files or total > max_bytes):
+        _, size, path = files.pop(0)
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        deleted.append(path)
+    return deleted
+
+
+def enabled(failure=True):
+    if LEVEL not in LEVELS:
+        return True  # Unknown value: behave like the default rather than lose failure evidence
+    return LEVEL == "always" or (failure and LEVEL == "on-failure")
+
+
+def _base_path(name, directory):
+    stamp = time.strftime("%Y%m%d_%H%M%S") + f"_{int(time.time() * 1000) % 1000:03d}"
+    return os.path.join(directory or ARTIFACTS_DIR, f"{name}_{stamp}")
+
+
+def _clip_options(box):
+    options = {"type": "jpeg", "quality": JPEG_QUALITY}
+    if box and box["width"] > 0 and box["height"] > 0:
+        options["clip"] = box
+    return options
+
+
+def capture(page, name, failure=True, html=False, widget_selectors=None, directory=None):
+    """Queues a JPEG of the clock widget (viewport if it isn't found) and optionally gzipped HTML.
+
+    Only the capture itself runs here; compression and disk writes happen in the background.
+    Returns the paths that will be written (empty below the configured level).
+    """
+    if not enabled(failure):
+        return []
+    base = _base_path(name, directory)
+    writer = _get_writer()
+    paths = []
+    try:
+        box = page.evaluate(WIDGET_BOX_JS, [widget_selectors or [], CLIP_PADDING]) if widget_selectors else None
+        writer.submit(base + ".jpg", page.screenshot(**_clip_options(box)))
+        paths.append(base + ".jpg")
+        if html:
+            writer.submit(base + ".html.gz", page.content().encode("utf-8"), compress=True)
+            paths.append(base + ".html.gz")
+    except Exception as e:
+        print(f"[Artifacts] Could not capture {name}: {e}")
+    return paths
+
+
+async def capture_async(page, name, failure=True, html=False, widget_selectors=None, directory=None):
+    """Same as capture() for async API pages (batch mode)."""
+    if not enabled(failure):
+        return []
+    base = _base_path(name, directory)
+    writer = _get_writer()
+    paths = []
+    try:
+        box = await page.evaluate(WIDGET_BOX_JS, [widget_selectors or [], CLIP_PADDING]) if widget_selectors else None
+        writer.submit(base + ".jpg", await page.screenshot(**_clip_options(box)))
+        paths.append(base + ".jpg")
+        if html:
+            writer.submit(base + ".html.gz", (await page.content()).encode("utf-8"), compress=True)
+            paths.append(base + ".html.gz")
+    except Exception as e:
+        print(f"[Artifacts] Could not capture {name}: {e}")
+    return paths
+
+
+def save_text(name, text, suffix=".txt", failure=True, directory=None):
+    """Queues a text artifact (e.g. the event log). Returns its path, or None below the level."""
+    if not enabled(failure):
+        return None
+    path = _base_path(name, directory) + suffix
+    _get_writer().submit(path, text.encode("utf-8"))
+    return path
+
+
+def start_trace(context):
+    """Starts a Playwright trace on context when tracing is enabled. Returns True if recording."""
+    if not TRACE or LEVEL == "none":
+        return False
+    try:
+        context.tracing.start(screenshots=True, snapshots=True)
+        return True
+    except Exception as e:
+        print(f"[Artifacts] Could not start trace: {e}")
+        return False
+
+
+def stop_trace(context, name=None, directory=None):
+    """Stops the trace: saved as name_<ts>.zip when name is given (failures), discarded otherwise."""
+    try:
+        if name:
+            path = _base_path(name, directory) + ".zip"
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            context.tracing.stop(path=path)
+            enforce_retention(os.path.dirname(path) or ".")
+            print(f"[Artifacts] Trace saved to {path} (npx playwright show-trace {path}).")
+            return path
+        context.tracing.stop()
+    except Exception as e:
+        print(f"[Artifacts] Could not stop trace: {e}")
+    return None
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import asyncio
+from urllib.parse import urlparse
+
+from playwright.async_api import async_playwright
+
+import artifacts
+import bixpe_bot
+import event_log
+import launch_profile
+import session_cache
+import punch_journal
+import login_resolver
+import clock_agent
+import readiness
+import resource_policy
+import run_metrics
+
+DEFAULT_CONCURRENCY = int(os.environ.get("BIXPE_BATCH_CONCURRENCY", "4"))
+ARTIFACTS_DIR = "batch_artifacts"
+
+
+def load_accounts(json_path):
+    """Reads the accounts file: [{"email": ..., "password_env": "VAR"} | {"email": ..., "password": ...}].
+
+    password_env is preferred so the file itself holds no secrets.
+    """
+    with open(json_path, "r") as f:
+        entries = json.load(f)
+    accounts = []
+    for entry in entries:
+        password = entry.get("password") or os.environ.get(entry.get("password_env", ""), "")
+        accounts.append({"email": entry["email"], "password": password})
+    return accounts
+
+
+def mask_email(email):
+    user, _, domain = email.partition("@")
+    return f"{user[:2]}***@{domain}"
+
+
+async def _login(page, email, password):
+    """Async twin of bixpe_bot.login (same resolver, learned selectors and Enter fallback)."""
+    selectors = await login_resolver.resolve_async(page, bixpe_bot.LOGIN_SELECTORS)
+    if not selectors:
+        raise Exception("Email field not found. Checked: " + ", ".join(bixpe_bot.EMAIL_SELECTORS))
+    await page.fill(selectors["email"], email)
+    await page.fill(selectors["password"], password)
+    if selectors["submit"]:
+        await page.click(selectors["submit"])
+    else:
+        await page.press(selectors["password"], 'Enter')
+
+
+async def _accept_cookies(page):
+    """Async twin of bixpe_bot.accept_cookies: the banner can intercept the login click."""
+    try:
+        if await page.is_visible("text=Aceptar todas", timeout=5000):
+            await page.click("text=Aceptar todas")
+        elif await page.is_visible("text=Aceptar", timeout=5000):
+            await page.click("text=Aceptar")
+        elif await page.is_visible("button[id*='cookie']", timeout=5000):
+            await page.click("button[id*='cookie']")
+    except Exception:
+        pass  # Ignore if no cookies found
+
+
+async def _is_session_alive(page, timeout=15000):
+    dashboard_selector = ", ".join(sel for sels in bixpe_bot.ACTION_SELECTORS.values() for sel in sels)
+    login_selector = "#emailLogin, #passwordLogin"
+    try:
+        await page.wait_for_selector(f"{dashboard_selector}, {login_selector}", state="attached", timeout=timeout)
+    except Exception:
+        return False
+    if await page.is_visible(login_selector):
+        return False
+    return await page.evaluate("(sel) => !!document.querySelector(sel)", dashboard_selector)
+
+
+def _watch_clock_xhr(page, host):
+    """Starts collecting successful Bixpe clock XHRs as request start times; create it before clicking."""
+    started = []
+
+    def on_response(response):
+        if readiness.is_clock_response(response, host) and response.status < 400:
+            started.append(readiness.request_started_at(response))
+
+    page.on("response", on_response)
+    return started
+
+
+async def _wait_clock_xhr(started, clicked_at, timeout=10000):
+    """Returns once a clock XHR sent at/after the click has succeeded. Raises TimeoutError otherwise."""
+    deadline = time.monotonic() + timeout / 1000
+    while not any(clicked_at is None or at >= clicked_at for at in started):
+        if time.monotonic() > deadline:
+            raise asyncio.TimeoutError("No clock XHR after the click")
+        await asyncio.sleep(0.1)
+
+
+async def _verify_punch(page, selector, started, clicked_at, xhr_timeout=10000, dom_timeout=10000):
+    """Races the clock XHR (sent after clicked_at) against the button state change; returns the winner or None."""
+    xhr = asyncio.ensure_future(_wait_clock_xhr(started, clicked_at, xhr_timeout))
+    dom = asyncio.ensure_future(page.wait_for_function(
+        f"(sel) => !({readiness.SHOWN_JS})(sel)", arg=selector, timeout=dom_timeout, polling=100))
+    pending = {xhr, dom}
+    confirmed_by = None
+    while pending and not confirmed_by:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.exception():
+                confirmed_by = "xhr" if task is xhr else "dom"
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return confirmed_by
+
+
+async def _save_failure_artifacts(page, email, action):
+    """Clipped JPEG + gzipped HTML in ARTIFACTS_DIR, written in the background."""
+    return await artifacts.capture_async(page, f"{session_cache.account_key(email)}_{action}", html=True,
+                                         widget_selectors=bixpe_bot.WIDGET_SELECTORS, directory=ARTIFACTS_DIR)
+
+
+async def clock_account(browser, account, action, dry_run, semaphore, use_session_cache=True, policy=None,
+                        use_journal=True):
+    """Runs one account in its own isolated BrowserContext. Never raises: returns a result dict."""
+    email = account["email"]
+    result = {"account": mask_email(email), "status": "FAILED", "login": None,
+              "seconds": None, "error": None, "artifacts": []}
+    if use_journal and not dry_run:
+        verdict, state = punch_journal.check(email, action, punch_journal.today())
+        if verdict in ("already_done", "invalid"):
+            result.update(status="ALREADY_DONE" if verdict == "already_done" else "SKIPPED", seconds=0.0,
+                          error=f"punch journal: {verdict} (workday {state})")
+            return result
+    async with semaphore:
+        metrics = run_metrics.RunMetrics(action, mode="batch")
+        metrics.extra["launch_profile"] = launch_profile.get_profile()[0]
+        started = time.perf_counter()
+        cached_state = session_cache.load_session(email) if use_session_cache else None
+        context = page = None
+        try:
+            if not account["password"]:
+                raise Exception("No password configured for this account")
+            context = await browser.new_context(storage_state=cached_state,
+                                                **launch_profile.context_options(bixpe_bot.CONTEXT_OPTIONS))
+            if policy:
+                await policy.install_async(context)
+            page = await context.new_page()
+            event_log.attach(page, tag=f"[{mask_email(email)}]")
+            page.set_default_timeout(60000)
+            with metrics.span("goto"):
+                await page.goto(bixpe_bot.BIXPE_URL)
+            with metrics.span("cookie_banner"):
+                await _accept_cookies(page)
+
+            with metrics.span("session_probe"):
+                session_alive = bool(cached_state) and await _is_session_alive(page)
+            if session_alive:
+                result["login"] = "cached"
+            else:
+                if cached_state:
+                    session_cache.invalidate_session(email)
+                with metrics.span("login"):
+                    await _login(page, email, account["password"])
+                result["login"] = "fresh"
+
+            all_selectors = [sel for sels in bixpe_bot.ACTION_SELECTORS.values() for sel in sels]
+            selector = bixpe_bot.ACTION_SELECTORS[action][0]
+            with metrics.span("dashboard_ready"):
+                handle = await page.wait_for_function(readiness.READY_JS, arg=[selector, all_selectors],
+                                                      timeout=30000, polling=100)
+                state = await handle.json_value()
+            if result["login"] == "fresh" and use_session_cache:
+                session_cache.write_session(email, await context.storage_state(),
+                                            login_seconds=time.perf_counter() - started)
+            dashboard_state = punch_journal.state_from_buttons(
+                await page.evaluate(punch_journal.DASHBOARD_STATE_JS, bixpe_bot.ACTION_SELECTORS))
+            if state == "hidden":
+                result["status"] = "ALREADY_DONE"
+                if not dry_run:
+                    punch_journal.record(email, action, "ALREADY_DONE", dashboard_state,
+                                         latency_seconds=time.perf_counter() - started, mode="batch")
+                return result
+
+            clock_xhrs = _watch_clock_xhr(page, urlparse(page.url).hostname)
+            agent = await clock_agent.run_async(page, selector, confirm=action in ["START", "END"], simulate=dry_run)
+            if agent["status"] not in ("clicked", "simulated"):
+                raise Exception(f"Target button {selector} disappeared before the click")
+            clock_agent.record_timings(agent, metrics)
+
+            if dry_run:
+                result["status"] = "SIMULATED"
+            else:
+                with metrics.span("punch_verified"):
+                    confirmed_by = await _verify_punch(page, selector, clock_xhrs, clock_agent.clicked_at(agent))
+                if not confirmed_by:
+                    raise Exception("Punch could not be confirmed (no XHR, button still shown)")
+                result["status"] = "DONE"
+                punch_journal.record(email, action, "DONE", dashboard_state,
+                                     latency_seconds=time.perf_counter() - started, mode="batch")
+        except Exception as e:
+            result["error"] = (str(e).splitlines() or [type(e).__name__])[0]
+            if page:
+                result["artifacts"] = await _save_failure_artifacts(page, email, action)
+        finally:
+            result["seconds"] = time.perf_counter() - started
+            if context:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            metrics.extra.update({"account": result["account"], "session": result["login"]})
+            metrics.record(result["status"])
+    return result
+
+
+async def run_batch_async(accounts, action, headless=True, dry_run=False, concurrency=DEFAULT_CONCURRENCY,
+                          use_session_cache=True, resource_preset=None, use_journal=True):
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    policy = resource_policy.load_policy(resource_preset)  # One shared policy: stats add up across accounts
+    async with async_playwright() as p:
+        launch_started = time.perf_counter()
+        browser = await p.chromium.launch(**launch_profile.launch_options(bixpe_bot.CHROMIUM_LAUNCH_OPTIONS, headless))
+        print(f"[Batch] Shared Chromium ({launch_profile.get_profile()[0]} profile) launched in "
+              f"{time.perf_counter() - launch_started:.1f}s "
+              f"({len(accounts)} accounts, concurrency {concurrency}).")
+        try:
+            return await asyncio.gather(*(
+                clock_account(browser, account, action, dry_run, semaphore, use_session_cache, policy, use_journal)
+                for account in accounts
+            ))
+        finally:
+            policy.report()
+            await browser.close()
+
+
+def print_results(results, action, total_seconds):
+    print(f"\n=== Batch {action} results ({total_seconds:.1f}s total) ===")
+    print(f"{'Account':<28} {'Status':<13} {'Login':<7} {'Latency':>8}  Details")
+    for r in results:
+        details = r["error"] or ""
+        if r["artifacts"]:
+            details += f" [artifacts: {', '.join(r['artifacts'])}]"
+        print(f"{r['account']:<28} {r['status']:<13} {r['login'] or '-':<7} {r['seconds']:>7.1f}s  {details}")
+
+
+def run_batch(accounts_file, action, headless=True, dry_run=False, concurrency=DEFAULT_CONCURRENCY,
+              use_session_cache=True, resource_preset=None, use_journal=True):
+    """Clocks every account of accounts_file. Returns the number of failed accounts."""
+    accounts = load_accounts(accounts_file)
+    started = time.perf_counter()
+    results = asyncio.run(run_batch_async(accounts, action, headless, dry_run, concurrency, use_session_cache,
+                                          resource_preset, use_journal))
+    print_results(results, action, time.perf_counter() - started)
+    failed = [r for r in results if r["status"] == "FAILED"]
+    event_log.finish(bool(failed), name=f"events_batch_{action}")
+    if failed:
+        print(f"{len(failed)} of {len(results)} accounts FAILED: {', '.join(r['account'] for r in failed)}")
+    return len(failed)
@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import urllib.request
+
+import bixpe_bot
+import launch_profile
+import mock_bixpe
+import punch_journal
+import run_metrics
+import session_cache
+
+# Workday state each action needs before it can be clocked, and the state it leaves behind
+PRE_STATE = {"START": "NOT_STARTED", "PAUSE": "WORKING", "RESUME": "PAUSED", "END": "WORKING"}
+POST_STATE = {"START": "WORKING", "PAUSE": "PAUSED", "RESUME": "WORKING", "END": "ENDED"}
+KEY_SPANS = ["browser_launch", "goto", "session_probe", "login_resolve", "login_dashboard", "dashboard_ready", "click", "punch_verified"]
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench"
+
+
+def _mock_state(base_url, payload=None):
+    """GET (payload None) or POST the mock's /__state control endpoint."""
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(base_url + "__state", data=data,
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def _read_records(metrics_file):
+    if not os.path.exists(metrics_file):
+        return []
+    with open(metrics_file, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_benchmark(actions, runs, config, headless=True, use_session_cache=False):
+    """Clocks each action `runs` times against a fresh mock. Returns one result (with its metrics record) per run."""
+    server, base_url, _ = mock_bixpe.start_server(config)
+    workdir = tempfile.mkdtemp(prefix="bixpe_bench_")
+    metrics_file = os.path.join(workdir, "bench_metrics.jsonl")
+    # Point the bot at the mock and keep every artifact out of the real working copy
+    bixpe_bot.BIXPE_URL = base_url
+    run_metrics.METRICS_FILE = metrics_file
+    run_metrics.PROM_TEXTFILE_DIR = None
+    session_cache.CACHE_DIR = os.path.join(workdir, "cache")
+    punch_journal.JOURNAL_FILE = os.path.join(workdir, "journal.jsonl")
+    original_cwd = os.getcwd()
+    os.chdir(workdir)
+    print(f"[Bench] Mock Bixpe on {base_url}, artifacts in {workdir}")
+
+    results, records = [], []
+    try:
+        for action in actions:
+            for i in range(runs):
+                _mock_state(base_url, {"workday": {BENCH_EMAIL: PRE_STATE[action]}})
+                started = time.perf_counter()
+                try:
+                    bixpe_bot.run_automation(BENCH_EMAIL, BENCH_PASSWORD, action, headless=headless,
+                                             use_session_cache=use_session_cache, resource_preset="off")
+                    exit_code = 0
+                except SystemExit as e:
+                    exit_code = e.code or 0
+                except Exception as e:
+                    print(f"[Bench] {action} #{i + 1} crashed: {e}")
+                    exit_code = 1
+                wall = time.perf_counter() - started
+                final_state = _mock_state(base_url)["workday"].get(BENCH_EMAIL)
+                result = {"action": action, "run": i + 1, "exit_code": exit_code, "wall_seconds": wall,
+                          "state_ok": final_state == POST_STATE[action]}
+                new_records = _read_records(metrics_file)[len(records):]
+                if new_records:
+                    result["record"] = new_records[-1]
+                    records += new_records
+                results.append(result)
+                print(f"[Bench] {action} #{i + 1}: exit {exit_code}, {wall:.2f}s, mock state {final_state}")
+    finally:
+        os.chdir(original_cwd)
+        server.shutdown()
+
+    return results
+
+
+def _stats(values):
+    if not values:
+        return "n/a"
+    return (f"min={min(values):.2f}s p50={run_metrics.percentile(values, 50):.2f}s "
+            f"p95={run_metrics.percentile(values, 95):.2f}s max={max(values):.2f}s "
+            f"mean={sum(values) / len(values):.2f}s")
+
+
+def print_report(results):
+    """Per-action summary. Returns {action: p95 of time-to-punch}."""
+    p95 = {}
+    print("\n=== Benchmark results ===")
+    for action in dict.fromkeys(r["action"] for r in results):
+        rows = [r for r in results if r["action"] == action]
+        failed = [r for r in rows if r["exit_code"] != 0 or not r["state_ok"]]
+        totals = [r["record"]["total_seconds"] for r in rows if "record" in r]
+        p95[action] = run_metrics.percentile(totals, 95)
+        print(f"{action}: {len(rows)} runs, {len(failed)} failed")
+        print(f"    {'time_to_punch':<16} {_stats(totals)}")
+        print(f"    {'wall':<16} {_stats([r['wall_seconds'] for r in rows])}")
+        for span in KEY_SPANS:
+            values = [r["record"]["spans"][span] for r in rows if span in r.get("record", {}).get("spans", {})]
+            if values:
+                print(f"    {span:<16} {_stats(values)}")
+    return p95
+
+
+def _pct(values, pct, unit):
+    return f"{run_metrics.percentile(values, pct):.2f}{unit}" if values else "n/a"
+
+
+def print_profile_comparison(results):
+    """One line per launch profile: does the flow still pass, startup time and Chromium peak RSS."""
+    print("\n=== Launch profiles ===")
+    print(f"{'Profile':<10} {'Runs':>4} {'Failed':>6} {'Launch p50':>11} {'Launch max':>11} "
+          f"{'RSS p50':>9} {'RSS max':>9} {'Punch p50':>10}")
+    for profile in dict.fromkeys(r["profile"] for r in results):
+        rows = [r for r in results if r["profile"] == profile]
+        records = [r["record"] for r in rows if "record" in r]
+        failed = [r for r in rows if r["exit_code"] != 0 or not r["state_ok"]]
+        launch = [rec["spans"]["browser_launch"] for rec in records if "browser_launch" in rec["spans"]]
+        rss = [rec["chromium_peak_rss_bytes"] / (1024 * 1024) for rec in records]
+        punch = [rec["total_seconds"] for rec in records]
+        print(f"{profile:<10} {len(rows):>4} {len(failed):>6} {_pct(launch, 50, 's'):>11} {_pct(launch, 100, 's'):>11} "
+              f"{_pct(rss, 50, 'MB'):>9} {_pct(rss, 100, 'MB'):>9} {_pct(punch, 50, 's'):>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmark against the local Bixpe mock")
+    parser.add_argument("--actions", default="START,PAUSE,RESUME,END", help="Comma-separated actions to clock")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per action")
+    parser.add_argument("--visible", action="store_true", help="Show the browser")
+    parser.add_argument("--session-cache", action="store_true", help="Reuse the login between runs (warm path)")
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--overlay-ms", type=int, default=600)
+    parser.add_argument("--render-ms", type=int, default=300)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--max-p95", type=float, default=None,
+                        help="Exit 1 if any action's time-to-punch p95 exceeds this many seconds")
+    parser.add_argument("--json", help="Also write the raw results to this file")
+    parser.add_argument("--launch-profiles", default=launch_profile.ACTIVE_PROFILE,
+                        help="Comma-separated launch profiles to compare (e.g. default,lean)")
+    args = parser.parse_args()
+
+    actions = [a.strip().upper() for a in args.actions.split(",") if a.strip()]
+    unknown = [a for a in actions if a not in PRE_STATE]
+    if unknown:
+        parser.error(f"Unknown actions: {', '.join(unknown)}")
+
+    profiles = [name.strip() for name in args.launch_profiles.split(",") if name.strip()]
+    unknown = [name for name in profiles if name not in launch_profile.PROFILES]
+    if unknown:
+        parser.error(f"Unknown launch profiles: {', '.join(unknown)}")
+
+    cfg = mock_bixpe.MockConfig(args.latency_ms, args.overlay_ms, args.render_ms, args.fail_rate)
+    results, p95 = [], {}
+    for profile in profiles:
+        print(f"[Bench] Launch profile: {profile}")
+        launch_profile.ACTIVE_PROFILE = profile
+        profile_results = run_benchmark(actions, args.runs, cfg, headless=not args.visible,
+                                        use_session_cache=args.session_cache)
+        for result in profile_results:
+            result["profile"] = profile
+        results += profile_results
+        for action, value in print_report(profile_results).items():
+            # The regression gate applies to the slowest profile
+            previous = p95.get(action, 0)
+            p95[action] = None if value is None or previous is None else max(value, previous)
+    if len(profiles) > 1:
+        print_profile_comparison(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    failures = [r for r in results if r["exit_code"] != 0 or not r["state_ok"]]
+    regressions = [a for a, v in p95.items() if args.max_p95 is not None and (v is None or v > args.max_p95)]
+    if failures:
+        print(f"{len(failures)} runs failed.")
+    if regressions:
+        print(f"p95 above {args.max_p95:.2f}s for: {', '.join(regressions)}")
+    sys.exit(1 if failures or regressions else 0)
@@ -2,14 +2,32 @@ import os
 import sys
 import json
 import time
+IMPORT_STARTED = time.perf_counter()
 import argparse
-from datetime import datetime, date
-from playwright.sync_api import sync_playwright
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass # In CI/CD dotenv might not be needed/installed, or managed differently
+
+# python-dotenv is only needed for a local .env file; CI skips the import entirely
+if any(os.path.exists(os.path.join(d, ".env")) for d in (os.getcwd(), os.path.join(os.path.dirname(__file__), ".."))):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass # In CI/CD dotenv might not be needed/installed, or managed differently
+
+# Only stdlib-backed modules here: Playwright is imported once a punch is actually going to happen
+import artifacts
+import calendar_plan
+import event_log
+import launch_profile
+import preflight
+import punch_journal
+import session_cache
+import login_resolver
+import clock_agent
+import readiness
+import resource_policy
+import retry_policy
+import run_metrics
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
 def load_holidays(json_path):
     """Loads holidays from the JSON file."""
@@ -21,215 +39,247 @@ def load_holidays(json_path):
         print(f"Warning: {json_path} not found. No holidays loaded.")
         return []
 
-def is_holiday_or_weekend(holidays):
-    """Checks if today is a weekend or a holiday."""
-    today = date.today()
-    today_str = today.strftime("%Y-%m-%d")
-    
-    # Check Weekend (5=Saturday, 6=Sunday)
-    if today.weekday() >= 5:
-        print(f"Today is weekend ({today.strftime('%A')}). Skipping.")
-        return True
-        
-    # Check Holiday
-    if today_str in holidays:
-        print(f"Today is a holiday ({today_str}). Skipping.")
-        return True
-        
-    return False
-
-def run_automation(email, password, action, headless=True, dry_run=False):
-    p = sync_playwright().start()
+# Point at a local stand-in server for offline testing (e.g. http://127.0.0.1:8765/)
+BIXPE_URL = os.environ.get("BIXPE_URL", "https://worktime.bixpe.com/")
+
+# HTML source confirms id="emailLogin" and id="passwordLogin" per user docs
+# Fallbacks kept just in case, but prioritized
+EMAIL_SELECTORS = ['#emailLogin', '#Username', 'input[name="Username"]', 'input[placeholder="Email"]']
+PASSWORD_SELECTORS = ['#passwordLogin', '#Password', 'input[name="Password"]']
+SUBMIT_SELECTORS = ['#btn-loginSubmit', 'button[type="submit"]', 'text=Iniciar sesión']
+LOGIN_SELECTORS = {"email": EMAIL_SELECTORS, "password": PASSWORD_SELECTORS, "submit": SUBMIT_SELECTORS}
+
+# Define selector lists per User Documentation
+# START: #btn-start-workday (Modal: Yes/Cancel)
+# PAUSE: #btn-pause-lunch (No Modal)
+# RESUME: #btn-resume-workday (No Modal)
+# END: #btn-stop-workday (Modal: Yes/Cancel)
+
+# IMPORTANT: Only use button/div selectors, NOT SVG icons (.fa-*) as they don't have .click()
+ACTION_SELECTORS = {
+    "START": ["#btn-start-workday"],
+    "PAUSE": ["#btn-pause-lunch"],
+    "RESUME": ["#btn-resume-workday"],
+    "END": ["#btn-stop-workday"]
+}
+# What the clipped artifact screenshots show: the clock buttons and the processing overlay
+WIDGET_SELECTORS = [sel for sels in ACTION_SELECTORS.values() for sel in sels] + ["#processing-text"]
+
+def accept_cookies(page):
+    """Handle Cookies if present."""
     try:
-        # Launch with specific args to avoid detection/rendering issues
-        browser = p.chromium.launch(
-            headless=headless, 
-            args=[
-                "--no-sandbox", 
-                "--disable-setuid-sandbox",
-                "--disable-blink-features=AutomationControlled" 
-            ],
-            ignore_default_args=["--enable-automation"]
-        )
-        
-        # Use a standard User-Agent to avoid being blocked as a bot
-        # Also grant geolocation permissions as Bixpe might require them to show the clock-in buttons
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            permissions=['geolocation'],
-            geolocation={'latitude': 41.651304749576475, 'longitude': -0.9345988765123099}, # Zaragoza
-            viewport={'width': 1280, 'height': 720},
-            locale='es-ES'
-        )
-        page = context.new_page()
-        page.set_default_timeout(60000) # Increase default timeout to 60s
-        
-        # Capture console logs to debug JS errors
-        page.on("console", lambda msg: print(f"Browser Console: {msg.text}"))
-        
-        # Capture network failures to identify sources
-        page.on("requestfailed", lambda request: print(f"Request failed: {request.url} - {request.failure}"))
-        
-        # Capture console logs to debug JS errors
-        page.on("console", lambda msg: print(f"Browser Console: {msg.text}"))
-        
-        # Capture network failures to identify sources
-        page.on("requestfailed", lambda request: print(f"Request failed: {request.url} - {request.failure}"))
-        
-        # (Network blocking removed for stability)
-
-        
-        # -------------------------------------------------------------------------
-        # JS INJECTION: Override Geolocation API & Google Maps Mock
-        # -------------------------------------------------------------------------
-        # (Init script removed for debugging)
-        # -------------------------------------------------------------------------
-        # -------------------------------------------------------------------------
-
-
-        print("Navigating to Bixpe...")
-        page.goto("https://worktime.bixpe.com/")
-        
-        # Handle Cookies if present
-        try:
-            if page.is_visible("text=Aceptar todas", timeout=5000):
-                page.click("text=Aceptar todas")
-            elif page.is_visible("text=Aceptar", timeout=5000):
-                page.click("text=Aceptar")
-            elif page.is_visible("button[id*='cookie']", timeout=5000):
-                 page.click("button[id*='cookie']")
-        except:
-            pass # Ignore if no cookies found
-            
-        # Login
-        print("Logging in...")
-        try:
-            # HTML source confirms id="emailLogin" and id="passwordLogin" per user docs
-            # Fallbacks kept just in case, but prioritized
-            email_selectors = ['#emailLogin', '#Username', 'input[name="Username"]', 'input[placeholder="Email"]']
-            password_selectors = ['#passwordLogin', '#Password', 'input[name="Password"]']
-            submit_selectors = ['#btn-loginSubmit', 'button[type="submit"]', 'text=Iniciar sesión']
-            
-            # Fill Email
-            email_filled = False
-            for selector in email_selectors:
-                try:
-                    if page.is_visible(selector, timeout=2000):
-                        page.fill(selector, email)
-                        email_filled = True
-                        print(f"Filled email using: {selector}")
-                        break
-                except:
-                    continue
-            
-            if not email_filled:
-                print("Could not find email field. Dumping HTML snippet...")
-                print(page.inner_html("body")[:500])
-                # Screenshot for debug
-                page.screenshot(path="debug_no_email.png")
-                raise Exception("Email field not found. Checked: " + ", ".join(email_selectors))
-
-            # Fill Password
-            for selector in password_selectors:
-                try:
-                    if page.is_visible(selector, timeout=2000):
-                        page.fill(selector, password)
-                        print(f"Filled password using: {selector}")
-                        break
-                except:
-                    continue
-
-            # Click Login
-            clicked = False
-            for selector in submit_selectors:
-                try:
-                    if page.is_visible(selector, timeout=2000):
-                        page.click(selector)
-                        print(f"Clicked login button: {selector}")
-                        clicked = True
-                        break
-                except:
-                    continue
-            
-            if not clicked:
-                 # Last resort: press Enter
-                 page.press('input[type="password"]', 'Enter')
-                 print("Pressed Enter to login")
-            
-            # Wait for dashboard to load
-            print("Waiting for dashboard to load (networkidle)...")
-            try:
-                page.wait_for_load_state("networkidle", timeout=30000)
-                print("Network idle reached.")
-            except:
-                print("Warning: Network idle timeout. Proceeding...")
-            
-            # Explicit safety sleep to prevent crashes on dynamic loads
-            print("Sleeping 10s (via Playwright) to ensure dashboard stability...")
-            page.wait_for_timeout(10000)
-            print("Login wait finished. Checking URL...")
-            print(f"Post-login URL: {page.url}")
+        if page.is_visible("text=Aceptar todas", timeout=5000):
+            page.click("text=Aceptar todas")
+        elif page.is_visible("text=Aceptar", timeout=5000):
+            page.click("text=Aceptar")
+        elif page.is_visible("button[id*='cookie']", timeout=5000):
+             page.click("button[id*='cookie']")
+    except:
+        pass # Ignore if no cookies found
 
+def login(page, email, password, waits=None):
+    """Fills the login form and submits it. Raises if the form is missing."""
+    waits = waits or readiness.WaitLog()
+    event_log.log("Logging in...")
+    # All candidates of all fields are checked in one page evaluation; last run's winners go first
+    with waits.measure("login_resolve"):
+        selectors = login_resolver.resolve(page, LOGIN_SELECTORS)
 
-        except Exception as e:
-            print(f"Error during login: {e}")
-            print(f"Current URL: {page.url}")
-            print(f"Page Title: {page.title()}")
-            page.screenshot(path="error_login.png")
-            # Dump HTML for debugging
-            with open("debug_login.html", "w", encoding="utf-8") as f:
-                f.write(page.content())
-            print("Saved debug_login.html. Please verify selectors.")
-            # Cleanup handled in finally block
-            sys.exit(1)
-    finally:
-        pass  # Ensures try block is properly closed
+    if not selectors:
+        print("Could not find email field.")
+        event_log.log(f"Body HTML snippet: {page.inner_html('body')[:500]}", level="warning")
+        # Screenshot for debug
+        artifacts.capture(page, "debug_no_email")
+        raise Exception("Email field not found. Checked: " + ", ".join(EMAIL_SELECTORS))
 
-    # Selectors based on Action
-    print(f"Performing action: {action}")
+    page.fill(selectors["email"], email)
+    page.fill(selectors["password"], password)
+
+    if selectors["submit"]:
+        page.click(selectors["submit"])
+        event_log.log(f"Clicked login button: {selectors['submit']}")
+    else:
+        # Last resort: press Enter
+        page.press(selectors["password"], 'Enter')
+        event_log.log("Pressed Enter to login")
+
+    # Dashboard readiness is awaited by the caller (readiness.wait_for_action_ready)
+
+def wait_for_dashboard(page, timeout=30000):
+    """Blocks until the post-login response has rendered the action buttons. Raises on timeout."""
+    dashboard_selector = ", ".join(sel for sels in ACTION_SELECTORS.values() for sel in sels)
+    page.wait_for_selector(dashboard_selector, state="attached", timeout=timeout)
+
+def is_session_alive(page, timeout=15000):
+    """Dashboard probe: True if the action buttons render, False if Bixpe shows the login form."""
+    dashboard_selector = ", ".join(sel for sels in ACTION_SELECTORS.values() for sel in sels)
+    login_selector = "#emailLogin, #passwordLogin"
+    try:
+        page.wait_for_selector(f"{dashboard_selector}, {login_selector}", state="attached", timeout=timeout)
+    except Exception:
+        return False
+    if page.is_visible(login_selector):
+        return False
+    return page.evaluate(f"!!document.querySelector('{dashboard_selector}')")
+
+def load_schedule(json_path):
+    """Loads schedule.json (per-day action times + timezone)."""
+    try:
+        with open(json_path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print("Warning: schedule.json not found. Using defaults.")
+        return {}
+
+# Launch with specific args to avoid detection/rendering issues
+CHROMIUM_LAUNCH_OPTIONS = {
+    "args": [
+        "--no-sandbox", 
+        "--disable-setuid-sandbox",
+        "--disable-blink-features=AutomationControlled" 
+    ],
+    "ignore_default_args": ["--enable-automation"]
+}
+
+# Use a standard User-Agent to avoid being blocked as a bot
+# Also grant geolocation permissions as Bixpe might require them to show the clock-in buttons
+CONTEXT_OPTIONS = {
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "permissions": ['geolocation'],
+    "geolocation": {'latitude': 41.651304749576475, 'longitude': -0.9345988765123099}, # Zaragoza
+    "viewport": {'width': 1280, 'height': 720},
+    "locale": 'es-ES'
+}
+
+class ActionError(Exception):
+    """The clock action could not be performed or confirmed (debug artifacts already saved).
+
+    kind is a retry_policy failure class when the raise site knows it.
+    """
+
+    def __init__(self, message, kind=None):
+        super().__init__(message)
+        self.kind = kind
+
+def launch_browser(p, headless=True):
+    """Launches Chromium with the active launch profile (launch_profile.ACTIVE_PROFILE)."""
+    return p.chromium.launch(**launch_profile.launch_options(CHROMIUM_LAUNCH_OPTIONS, headless))
+
+def new_bixpe_context(browser, storage_state=None):
+    return browser.new_context(storage_state=storage_state, **launch_profile.context_options(CONTEXT_OPTIONS))
+
+def open_bixpe_page(context, waits=None):
+    """Opens a page on Bixpe with debug listeners attached and the cookie banner handled."""
+    waits = waits or readiness.WaitLog()
+    page = context.new_page()
+    page.set_default_timeout(60000) # Increase default timeout to 60s
     
-    # Define selector lists
-    # Define selector lists per User Documentation
-    # START: #btn-start-workday (Modal: Yes/Cancel)
-    # PAUSE: #btn-lunch-pause (No Modal)
-    # RESUME: #btn-resume-workday (No Modal)
-    # END: #btn-stop-workday (Modal: Yes/Cancel)
+    # Console messages and failed requests go to the event buffer (dumped if the run fails)
+    event_log.attach(page)
     
-    # IMPORTANT: Only use button/div selectors, NOT SVG icons (.fa-*) as they don't have .click()
-    selectors_map = {
-        "START": ["#btn-start-workday"],
-        "PAUSE": ["#btn-pause-lunch"],
-        "RESUME": ["#btn-resume-workday"],
-        "END": ["#btn-stop-workday"]
-    }
+    # Non-essential resources are filtered at context level (resource_policy.json)
+
     
-    target_selectors = selectors_map.get(action, [])
+    # -------------------------------------------------------------------------
+    # JS INJECTION: Override Geolocation API & Google Maps Mock
+    # -------------------------------------------------------------------------
+    # (Init script removed for debugging)
+    # -------------------------------------------------------------------------
+    # -------------------------------------------------------------------------
+
+
+    event_log.log("Navigating to Bixpe...")
+    with waits.measure("goto"):
+        page.goto(BIXPE_URL)
+
+    with waits.measure("cookie_banner"):
+        accept_cookies(page)
+    return page
+
+def authenticate(page, context, email, password, cached_state=None, waits=None, use_session_cache=True):
+    """Reuses the cached session if Bixpe accepts it, otherwise logs in and rewrites the cache.
+
+    Returns the auth phase duration in seconds. Raises if the login form can't be used.
+    """
+    waits = waits or readiness.WaitLog()
+    auth_started = time.perf_counter()
+    with waits.measure("session_probe"):
+        session_alive = bool(cached_state) and is_session_alive(page)
+    if session_alive:
+        auth_seconds = time.perf_counter() - auth_started
+        last_login = session_cache.load_session_meta(email).get("login_seconds")
+        waits.extra["session"] = "cached"
+        print(f"[Timing] Session restored from cache in {auth_seconds:.1f}s (login skipped).")
+        if last_login:
+            print(f"[Timing] Last fresh login took {last_login:.1f}s -> saved ~{last_login - auth_seconds:.1f}s this run.")
+        return auth_seconds
+
+    if cached_state:
+        print("Cached session rejected by Bixpe (login form shown). Falling back to fresh login.")
+        session_cache.invalidate_session(email)
+    login(page, email, password, waits=waits)
+    # Only a loaded dashboard proves the login worked (and, with an AJAX login, set the auth cookie):
+    # the cache and the timing must not capture the login page
+    with waits.measure("login_dashboard"):
+        wait_for_dashboard(page)
+    waits.extra["session"] = "fresh"
+    auth_seconds = time.perf_counter() - auth_started
+    print(f"[Timing] Fresh login took {auth_seconds:.1f}s.")
+    if use_session_cache:
+        try:
+            session_cache.save_session(context, email, login_seconds=auth_seconds)
+        except Exception as e:
+            print(f"Warning: could not cache session: {e}")
+    return auth_seconds
+
+def dump_login_failure(page, error):
+    print(f"Error during login: {error}")
+    print(f"Current URL: {page.url}")
+    print(f"Page Title: {page.title()}")
+    # Screenshot + gzipped HTML, written in the background
+    saved = artifacts.capture(page, "error_login", html=True)
+    if saved:
+        print(f"Queued {', '.join(saved)}. Please verify selectors.")
+
+def perform_action(page, action, dry_run=False, waits=None):
+    """Clicks the action button on an authenticated dashboard and verifies the punch.
+
+    Returns "DONE", "SIMULATED" or "ALREADY_DONE" (button hidden). Raises ActionError.
+    """
+    waits = waits or readiness.WaitLog()
+    # Selectors based on Action
+    event_log.log(f"Performing action: {action}")
+    
+    target_selectors = ACTION_SELECTORS.get(action, [])
+    all_action_selectors = [sel for sels in ACTION_SELECTORS.values() for sel in sels]
     
-    # 1. FIND THE BUTTON
+    # 1. FIND THE BUTTON (returns as soon as the dashboard settles, no fixed sleeps)
     found_selector = None
     for sel in target_selectors:
         try:
-            # Quick check if it exists in DOM
-            if page.evaluate(f"!!document.querySelector('{sel}')"):
-                print(f"Selector found in DOM: {sel}")
-                # Check visibility
-                if page.is_visible(sel):
-                    print(f"Selector is visible: {sel}")
-                    found_selector = sel
-                    break
-                else:
-                    print(f"Selector exists but HIDDEN: {sel}")
-                    print(">>> This likely means you are ALREADY CLOCKED IN for this action.")
-                    print(">>> The button is not available. Exiting gracefully.")
-                    browser.close()
-                    p.stop()
-                    sys.exit(0)  # Exit with 0 (not an error, just already done)
+            event_log.log(f"Waiting for dashboard to offer {sel}...")
+            with waits.measure("dashboard_ready"):
+                state = readiness.wait_for_action_ready(page, sel, all_action_selectors, timeout=30000)
+            event_log.log(f"Post-login URL: {page.url}")
+            try:
+                offered = page.evaluate(punch_journal.DASHBOARD_STATE_JS, ACTION_SELECTORS)
+                waits.extra["dashboard_state"] = punch_journal.state_from_buttons(offered)
+            except Exception:
+                pass
+            if state == "ready":
+                event_log.log(f"Selector is visible and clickable: {sel}")
+                found_selector = sel
+                break
+            else:
+                print(f"Selector exists but HIDDEN: {sel}")
+                print(">>> This likely means you are ALREADY CLOCKED IN for this action.")
+                print(">>> The button is not available.")
+                return "ALREADY_DONE"
         except Exception as e:
-            print(f"Check failed for {sel}: {e}")
+            event_log.log(f"Check failed for {sel}: {e}", level="warning")
             
     if not found_selector:
-        print(f"ERROR: Target button for {action} not found.")
-        print("--- DOM PROBE: VISIBLE BUTTONS ---")
+        print(f"ERROR: Target button for {action} not found (visible buttons in the event log).")
         try:
             # JavaScript to extract details of all visible buttons
             buttons_info = page.evaluate("""() => {
@@ -247,225 +297,420 @@ def run_automation(email, password, action, headless=True, dry_run=False):
             }""")
             
             for b in buttons_info:
-                print(f"Found: <{b['tag']} id='{b['id']}' class='{b['className']}'> Text: '{b['text']}'")
-                
+                event_log.log(f"Found: <{b['tag']} id='{b['id']}' class='{b['className']}'> Text: '{b['text']}'",
+                              level="warning", source="dom_probe")
         except Exception as e:
-            print(f"DOM Probe failed: {e}")
-            
-        print("--------------------------------")
+            event_log.log(f"DOM Probe failed: {e}", level="warning", source="dom_probe")
 
-        # Emergency dump
-        print("Dumping HTML...")
+        # Emergency dump (screenshot + gzipped HTML)
+        artifacts.capture(page, f"error_no_btn_{action}", html=True, widget_selectors=WIDGET_SELECTORS)
         try:
-            with open(f"debug_fail_{action}.html", "w", encoding="utf-8") as f:
-                f.write(page.content())
-            print(f"Saved debug_fail_{action}.html")
-        except Exception as e:
-            print(f"Could not save HTML dump: {e}")
-            
-        page.screenshot(path=f"error_no_btn_{action}.png")
-        if not dry_run:
-             sys.exit(1)
-
-    # ---------------------------------------------------------
-    # DIAGNOSTIC CHECKLIST (Per User Request)
-    # ---------------------------------------------------------
-    print("\n--- PRE-CLICK DIAGNOSTIC CHECKLIST ---")
-    
-    # 1. Overlay Check
-    try:
-        overlay_visible = page.evaluate("() => { const el = document.querySelector('#processing-text'); return el && (el.offsetWidth > 0 || window.getComputedStyle(el).display !== 'none'); }")
-        print(f"[Check 1] Overlay '#processing-text' visible? {overlay_visible}")
-    except:
-        print("[Check 1] Overlay '#processing-text' not found in DOM.")
+            overlay_up = page.evaluate(f"({readiness.SHOWN_JS})('#processing-text')")
+        except Exception:
+            overlay_up = False
+        if overlay_up:
+            raise ActionError(f"Target button for {action} not found ('#processing-text' never cleared)",
+                              kind=retry_policy.OVERLAY_STUCK)
+        raise ActionError(f"Target button for {action} not found", kind=retry_policy.SELECTOR_MISS)
 
-    # 2. Target Button Properties
-    if found_selector:
-        try:
-            btn_info = page.evaluate(f"""() => {{
-                const el = document.querySelector('{found_selector}');
-                if (!el) return null;
-                const rect = el.getBoundingClientRect();
-                
-                // Check what element is at the button's center (Click Interception Check)
-                const centerX = rect.left + rect.width / 2;
-                const centerY = rect.top + rect.height / 2;
-                const topEl = document.elementFromPoint(centerX, centerY);
-                
-                return {{
-                    tagName: el.tagName,
-                    display: window.getComputedStyle(el).display,
-                    visibility: window.getComputedStyle(el).visibility,
-                    rect: rect,
-                    opacity: window.getComputedStyle(el).opacity,
-                    coveredBy: topEl ? (topEl.id || topEl.className || topEl.tagName) : 'None'
-                }};
-            }}""")
-            
-            if btn_info:
-                print(f"[Check 2] Button Tag: {btn_info['tagName']} (Expected: DIV or BUTTON)")
-                print(f"[Check 3] Visibility: {btn_info['display']} / {btn_info['visibility']} / Opacity: {btn_info['opacity']}")
-                print(f"[Check 4] Dimensions: {btn_info['rect']}")
-                print(f"[Check 5] Element at Click Point: {btn_info['coveredBy']}")
-                
-                if btn_info['coveredBy'] and btn_info['coveredBy'] not in found_selector:
-                     print(f"    WARNING: Button might be covered by '{btn_info['coveredBy']}'!")
-            else:
-                print("[Check 2] Button info could not be retrieved.")
-        except Exception as e:
-            print(f"Diagnostic failed: {e}")
-    print("------------------------------------------\n")
-
-    # 2. CLICK THE BUTTON
-    # IMPLEMENTING TECHNICAL FIXES (Strategies A, B, C)
+    # 2. DIAGNOSE, CLICK AND CONFIRM IN ONE ROUND TRIP
+    # The injected agent runs the pre-click checklist, waits for the '#processing-text'
+    # overlay, JS-clicks the DIV and confirms (or, simulating, cancels) the SweetAlert2 modal.
+    needs_confirmation = action in ["START", "END"]  # PAUSE and RESUME have no modal
+    if needs_confirmation and dry_run:
+        print("[SIMULATION] Simulation mode active. The confirmation dialog will be CANCELLED.")
+    watcher = readiness.ClockWatcher(page)  # Listen for the clock XHR before it can fire
     try:
-        # Strategy A: Smart Wait for "Ghost Layer"
-        print("Strategy A: Waiting for '#processing-text' overlay to disappear...")
-        try:
-            # Wait short time for it to possibly appear/disappear
-            page.wait_for_selector("#processing-text", state="hidden", timeout=5000)
-            print("Overlay cleared.")
-        except Exception as e:
-            print(f"Overlay wait warning (might not exist): {e}")
-
-        # Strategy C: The "Nuclear Option" (JavaScript Dispatch)
-        # We prioritize this because the element is a DIV and might have tooltips/overlays
-        print(f"Strategy C: Attempting JS Click on: {found_selector}")
-        page.evaluate(f"document.querySelector('{found_selector}').click()")
-        print("JS click command sent.")
-        
-        # Fallback Strategy B: Force Click if JS didn't trigger navigation/modal
-        # We wait a split second to see if something happens
-        time.sleep(1)
-        
+        result = clock_agent.run(page, found_selector, confirm=needs_confirmation, simulate=dry_run)
     except Exception as e:
+        watcher.detach()
         print(f"FATAL ERROR clicking button: {e}")
-        print(">>> Click failed. Taking error screenshot and exiting.")
-        page.screenshot(path=f"error_click_{action}_{time.strftime('%Y%m%d_%H%M%S')}.png")
-        browser.close()
-        p.stop()
-        sys.exit(1)  # Exit with error code
-
-    # Continue to confirmation check
-
-    # 3. HANDLE CONFIRMATION (START and END require confirmation)
-    if action in ["START", "END"]:
-        print("Checking for confirmation dialog...")
-        time.sleep(1) # Slight delay for modal animation
-        
-        # Decide whether to Confirm or Cancel based on Simulation Mode
-        if dry_run: # Simulation mode requested by user
-             print("[SIMULATION] Simulation mode active. searching for CANCEL button...")
-             # Look for swal2-cancel or general cancel
-             confirm_selector_js = "button.swal2-cancel, button.cancel"
-             action_verb = "CANCELLED"
+        print(">>> Click failed. Taking error screenshot.")
+        artifacts.capture(page, f"error_click_{action}", widget_selectors=WIDGET_SELECTORS)
+        raise ActionError(f"Click failed: {e}")
+    if result["status"] not in ("clicked", "simulated"):
+        watcher.detach()
+        print(f"ERROR: Target button {found_selector} disappeared before the click.")
+        artifacts.capture(page, f"error_click_{action}", widget_selectors=WIDGET_SELECTORS)
+        raise ActionError(f"Target button for {action} disappeared before the click", kind=retry_policy.SELECTOR_MISS)
+    clock_agent.print_report(result, found_selector)
+    clock_agent.record_timings(result, waits)
+
+    # 4. VERIFY THE PUNCH WAS RECORDED (Bixpe XHR or button state change, separate deadlines)
+    if dry_run:
+        watcher.detach()
+        print("[SIMULATION] Skipping punch verification (nothing was recorded).")
+    else:
+        with waits.measure("punch_verified"):
+            verification = watcher.verify(found_selector, clicked_at=clock_agent.clicked_at(result),
+                                          xhr_timeout=10000, dom_timeout=10000)
+        if verification["confirmed_by"]:
+            print(f"Punch confirmed by {verification['confirmed_by']} in {verification['seconds']:.2f}s "
+                  f"(XHR: {verification['xhr']}).")
         else:
-             print("Check for CONFIRM button...")
-             # Look for swal2-confirm or general confirm
-             confirm_selector_js = "button.swal2-confirm, button.confirm"
-             action_verb = "CONFIRMED"
-
-        confirm_script = f"""
-            (() => {{
-                const btns = document.querySelectorAll('{confirm_selector_js}');
-                for (const btn of btns) {{
-                    if (btn.offsetParent !== null) {{
-                        btn.click();
-                        return true;
-                    }}
-                }}
-                return false;
-            }})()
+            print(f"ERROR: Punch for {action} could not be confirmed (XHR: {verification['xhr']}, button still shown).")
+            artifacts.capture(page, f"error_unconfirmed_{action}", widget_selectors=WIDGET_SELECTORS)
+            raise ActionError(f"Punch for {action} could not be confirmed", kind=retry_policy.UNCONFIRMED)
+
+    # Success screenshot only with --artifacts always: otherwise the run ends at the confirmed punch
+    if artifacts.enabled(failure=False):
+        with waits.measure("screenshot"):
+            artifacts.capture(page, f"screenshot_{action}", failure=False, widget_selectors=WIDGET_SELECTORS)
+    return "SIMULATED" if dry_run else "DONE"
+
+def get_credentials(visible=False):
+    email = os.environ.get("BIXPE_EMAIL")
+    password = os.environ.get("BIXPE_PASSWORD")
+
+    if not email or not password:
+        # Fallback for local testing if env vars not set (remove in production!)
+        email = input("Enter Bixpe Email: ") if visible else None
+        password = input("Enter Bixpe Password: ") if visible else None
+    
+    if not email or not password:
+        print("Error: BIXPE_EMAIL and BIXPE_PASSWORD environment variables must be set.")
+        sys.exit(1)
+    return email, password
+
+class BixpeSession:
+    """Chromium + context + page for one account, with the resets the retry engine needs.
+
+    metrics receives the spans; callers running several actions swap it per action.
+    """
+
+    def __init__(self, p, email, password, metrics, headless=True, use_session_cache=True, policy=None):
+        self.p = p
+        self.email = email
+        self.password = password
+        self.metrics = metrics
+        self.headless = headless
+        self.use_session_cache = use_session_cache
+        self.policy = policy or resource_policy.ResourcePolicy("off")
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.cached_state = None
+        self.tracing = False
+
+    def open_context(self):
+        # Reuse cookies + localStorage from a previous successful login (per account, with TTL)
+        self.cached_state = session_cache.load_session(self.email) if self.use_session_cache else None
+        with self.metrics.span("context_creation"):
+            self.context = new_bixpe_context(self.browser, storage_state=self.cached_state)
+            self.policy.install(self.context)
+        self.tracing = artifacts.start_trace(self.context)
+        self.page = open_bixpe_page(self.context, waits=self.metrics)
+
+    def open_browser(self):
+        self.close()
+        started = time.perf_counter()
+        with self.metrics.span("browser_launch"):
+            self.browser = launch_browser(self.p, headless=self.headless)
+        self.metrics.extra["launch_profile"] = launch_profile.get_profile()[0]
+        print(f"[Launch] Chromium ({self.metrics.extra['launch_profile']} profile) up in "
+              f"{time.perf_counter() - started:.2f}s.")
+        self.open_context()
+
+    def close(self, trace_name=None):
+        """Closes Chromium; a running trace is saved as trace_name (failures) or discarded."""
+        if self.tracing and self.context:
+            artifacts.stop_trace(self.context, trace_name)
+            self.tracing = False
+        if self.browser:
+            try:
+                self.browser.close()
+            except Exception:
+                pass
+        self.browser = self.context = self.page = None
+
+    def auth(self):
+        return authenticate(self.page, self.context, self.email, self.password, cached_state=self.cached_state,
+                            waits=self.metrics, use_session_cache=self.use_session_cache)
+
+    def recover(self, kind):
+        """Cheapest reset that addresses this failure class."""
+        if kind == retry_policy.BROWSER_CRASHED or not self.browser or not self.browser.is_connected():
+            self.open_browser()
+        elif kind == retry_policy.SESSION_EXPIRED:
+            session_cache.invalidate_session(self.email)
+            if self.tracing:
+                artifacts.stop_trace(self.context)  # The new context records its own trace
+            self.context.close()
+            self.open_context()
+        else:
+            with self.metrics.span("goto"):
+                self.page.goto(BIXPE_URL)
+            accept_cookies(self.page)
+
+    def recover_for_action(self, kind):
+        self.recover(kind)
+        if kind in (retry_policy.SESSION_EXPIRED, retry_policy.BROWSER_CRASHED):
+            self.auth()  # New context: the session cache decides
+        else:
+            self.ensure_logged_in()
+
+    def ensure_logged_in(self):
+        """Probes the session this context already holds; logs in again only if Bixpe shows the login form.
+
+        Unlike auth() it reports no cache savings: nothing was loaded from the cache.
         """
+        with self.metrics.span("session_probe"):
+            alive = is_session_alive(self.page)
+        if alive:
+            return
+        print("Session expired (login form shown). Logging in again.")
+        session_cache.invalidate_session(self.email)
+        started = time.perf_counter()
+        login(self.page, self.email, self.password, waits=self.metrics)
+        with self.metrics.measure("login_dashboard"):
+            wait_for_dashboard(self.page)
+        self.metrics.extra["relogins"] = self.metrics.extra.get("relogins", 0) + 1
+        if self.use_session_cache:
+            try:
+                session_cache.save_session(self.context, self.email, login_seconds=time.perf_counter() - started)
+            except Exception as e:
+                print(f"Warning: could not cache session: {e}")
+
+    def refresh(self):
+        """Reloads the dashboard so its state is current; re-logs in if the session expired."""
+        with self.metrics.span("dashboard_refresh"):
+            self.page.reload()
+            accept_cookies(self.page)
+        self.ensure_logged_in()
+
+    def run_action(self, action, dry_run, engine):
+        # Re-running the action is safe: a punch that did register shows up as ALREADY_DONE
+        return engine.run("action", lambda: perform_action(self.page, action, dry_run=dry_run, waits=self.metrics),
+                          self.recover_for_action, get_page=lambda: self.page)
+
+
+def run_automation(email, password, action, headless=True, dry_run=False, use_session_cache=True,
+                   resource_preset=None, deadline=None, fire_at=None):
+    """Launches Chromium, authenticates and performs the action, retrying both phases.
+
+    Failures are classified (retry_policy) and retried with per-class backoff until
+    deadline (a time.time() value; default: retry_policy.DEADLINE_MINUTES from now).
+    The browser and context are reused unless the failure requires a fresh one.
+    With fire_at (aware datetime) the staged page is held and the click goes out at that time.
+    """
+    from playwright.sync_api import sync_playwright
+    metrics = run_metrics.RunMetrics(action)
+    event_log.SINK.reset()
+    deadline = deadline or time.time() + retry_policy.DEADLINE_MINUTES * 60
+    engine = retry_policy.RetryEngine(deadline, metrics)
+    p = sync_playwright().start()
+    policy = resource_policy.load_policy(resource_preset, warm=fire_at is not None)
+    session = BixpeSession(p, email, password, metrics, headless=headless, use_session_cache=use_session_cache,
+                           policy=policy)
+
+    def finish(outcome, exit_code=None):
+        policy.report()
+        metrics.extra["resources"] = policy.summary()
+        # Cleanup resources (the trace and the full event log are only kept when the run failed)
+        failed = outcome not in ("DONE", "SIMULATED", "ALREADY_DONE")
+        session.close(trace_name=f"trace_{action}" if failed else None)
+        event_log.finish(failed, name=f"events_{action}")
+        p.stop()
+        metrics.record(outcome)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    try:
+        session.open_browser()
+    except Exception as e:
+        print(f"Browser launch failed: {e}")
+        finish("LAUNCH_FAILED", 1)
+
+    try:
+        auth_seconds = engine.run("login", session.auth, session.recover, get_page=lambda: session.page)
+    except Exception as e:
         try:
-            if page.evaluate(confirm_script):
-                print(f"Confirmation dialog {action_verb} successfully.")
-                time.sleep(2)
-            else:
-                print("No confirmation dialog found (or not needed).")
+            dump_login_failure(session.page, e)
+        except Exception as dump_error:
+            print(f"Could not save login debug files: {dump_error}")
+        finish("LOGIN_FAILED", 1)
+
+    if fire_at is not None:
+        import arm_fire
+        try:
+            arm_fire.arm(session, action, fire_at, engine)
         except Exception as e:
-            print(f"Confirmation check error: {e}")
-    else:
-        print(f"Action {action} requires no confirmation interaction.")
+            print(f"[Arm] Giving up: the page could not be staged for {action} before the deadline ({e}).")
+            finish("ARM_FAILED", 1)
 
-    # Success Screenshot
-    page.screenshot(path=f"screenshot_{action}_{time.strftime('%Y%m%d_%H%M%S')}.png")
-    
-    # Cleanup resources
+    fired = time.perf_counter()
+    fired_at = time.time()
     try:
-        browser.close()
-    except:
-        pass
-    p.stop()
+        outcome = session.run_action(action, dry_run, engine)
+    except Exception as e:
+        print(f"Action failed: {e}")
+        outcome = None
+    if fire_at is not None:
+        arm_fire.report(metrics, fire_at, fired_at)
+    if outcome is None:
+        finish("ACTION_FAILED", 1)  # Exit with error code
+
+    # Armed runs count from the fire time, not from the early start. Simulations never touch the journal
+    if not dry_run:
+        punch_journal.record(email, action, outcome, metrics.extra.get("dashboard_state"),
+                             latency_seconds=time.perf_counter() - (fired if fire_at is not None else metrics.started))
+    if outcome == "ALREADY_DONE":
+        print("Exiting gracefully.")
+        finish(outcome, 0)  # Exit with 0 (not an error, just already done)
+    finish(outcome)
+    print(f"[Timing] Run finished in {metrics.recorded['total_seconds']:.1f}s (auth phase {auth_seconds:.1f}s).")
     return True
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--action", choices=["START", "PAUSE", "RESUME", "END"], required=True)
+    parser.add_argument("--action", choices=["START", "PAUSE", "RESUME", "END"])
     parser.add_argument("--visible", action="store_true", help="Run with visible browser for debugging")
     parser.add_argument("--force", action="store_true", help="Ignore schedule and holiday checks")
     parser.add_argument("--simulate", action="store_true", help="Perform login/nav, click action, but CANCEL the confirmation modal.")
     parser.add_argument("--dry-run", action="store_true", help="(Legacy) Alias for --simulate")
+    parser.add_argument("--no-session-cache", action="store_true", help="Always perform a fresh login and do not persist the session")
+    parser.add_argument("--accounts", help="JSON accounts file: clock every account in parallel on one shared browser")
+    parser.add_argument("--concurrency", type=int, default=None, help="Max accounts processed at once in --accounts mode")
+    parser.add_argument("--resource-policy", help="Preset from resource_policy.json (off, safe, minimal). Default: the file's preset (off for --daemon, --sequence and --arm)")
+    parser.add_argument("--http-fast", action="store_true", help="Replay the recorded HTTP requests without a browser (falls back to the browser on mismatch)")
+    parser.add_argument("--record-http", action="store_true", help="Perform a REAL punch in the browser and record its HTTP requests for --http-fast")
+    parser.add_argument("--daemon", action="store_true", help="Stay resident and fire every schedule.json action from a warm browser")
+    parser.add_argument("--recheck", action="store_true", help="Ignore the punch journal and ask the live dashboard")
+    parser.add_argument("--check-only", action="store_true", help="Report whether the action would run today (no browser, no login) and exit")
+    parser.add_argument("--sequence", help="Run several actions on one login, e.g. START,PAUSE+5,RESUME@15:00,END")
+    parser.add_argument("--step-delay", type=float, default=0.0, help="Seconds between --sequence steps without +N/@HH:MM")
+    parser.add_argument("--arm", action="store_true", help="Stage launch/login/dashboard early and click at the exact scheduled time")
+    parser.add_argument("--arm-at", help="Like --arm, but click at this HH:MM (schedule.json timezone)")
+    parser.add_argument("--launch-profile", choices=sorted(launch_profile.PROFILES),
+                        help="Chromium launch profile (default: BIXPE_LAUNCH_PROFILE or 'default'); 'lean' for small runners")
+    parser.add_argument("--artifacts", choices=artifacts.LEVELS,
+                        help="Debug artifacts to keep: none, on-failure (default, BIXPE_ARTIFACTS) or always")
+    parser.add_argument("--trace", action="store_true", help="Record a Playwright trace, saved only if the run fails")
+    parser.add_argument("--lead-time", type=float, default=None, help="Seconds before the target to start staging (default: BIXPE_ARM_LEAD_SECONDS or 120)")
     args = parser.parse_args()
+    if args.launch_profile:
+        launch_profile.ACTIVE_PROFILE = args.launch_profile
+    if args.artifacts:
+        artifacts.LEVEL = args.artifacts
+    if args.trace:
+        artifacts.TRACE = True
+    if args.sequence and args.action:
+        parser.error("--sequence and --action are mutually exclusive")
+    if not args.action and not args.daemon and not args.sequence:
+        parser.error("--action is required (unless --daemon or --sequence is used)")
+    sequence = None
+    if args.sequence:
+        import sequence_runner
+        try:
+            sequence = sequence_runner.parse_sequence(args.sequence, args.step_delay)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.accounts or args.http_fast or args.record_http:
+            parser.error("--sequence cannot be combined with --accounts, --http-fast or --record-http")
+    armed = args.arm or args.arm_at
+    if armed:
+        if not args.action or args.accounts or args.http_fast or args.record_http:
+            parser.error("--arm/--arm-at need a single --action (no --accounts, --http-fast or --record-http)")
+        if args.arm_at:
+            parts = args.arm_at.split(":")
+            if len(parts) != 2 or not all(part.isdigit() for part in parts) or int(parts[0]) > 23 or int(parts[1]) > 59:
+                parser.error(f"--arm-at expects HH:MM, got '{args.arm_at}'")
     
     # Unify simulation flags
     is_simulation = args.simulate or args.dry_run
 
-    # Load holidays
     holidays_file = os.path.join(os.path.dirname(__file__), "..", "holidays.json")
+    schedule_file = os.path.join(os.path.dirname(__file__), "..", "schedule.json")
+
+    if args.daemon:
+        # The daemon evaluates schedule.json / holidays.json itself before every punch
+        import scheduler_daemon
+        email, password = get_credentials(args.visible)
+        scheduler_daemon.run_daemon(email, password, schedule_file, holidays_file, headless=not args.visible,
+                                    dry_run=is_simulation, use_session_cache=not args.no_session_cache,
+                                    resource_preset=args.resource_policy)
+        sys.exit(0)
+
+    # Preflight (stdlib only): calendar in schedule.json's timezone, holidays and overrides.
+    # Weekends/holidays/"off" days ALWAYS skip; --force only skips the scheduled-action check.
     holidays = load_holidays(holidays_file)
+    schedule_config = load_schedule(schedule_file)
+    if sequence:
+        # Every step is checked against the schedule; the journal is checked per step later
+        sequence, decision = sequence_runner.scheduled_steps(sequence, schedule_config, holidays,
+                                                             calendar_plan.load_overrides(), force=args.force)
+    else:
+        decision = preflight.evaluate(args.action, schedule_config, holidays, calendar_plan.load_overrides(),
+                                      force=args.force,
+                                      # The journal is per account in batch mode: checked later
+                                      email=None if args.recheck or args.accounts else os.environ.get("BIXPE_EMAIL"))
 
-    # ALWAYS check holidays/weekends (even with --force)
-    # --force only skips schedule/time checks, not holiday checks
-    if is_holiday_or_weekend(holidays):
-        print("Exiting: Today is a holiday or weekend.")
+    if args.check_only:
+        preflight.report(decision, IMPORT_SECONDS, IMPORT_STARTED)
+        # Fail before the browser install rather than after it
+        sys.exit(1 if decision["run"] and not preflight.credentials_present() else 0)
+
+    if not decision["run"]:
+        print(f"{decision['reason']} Skipping.")
         sys.exit(0)
+    print(f"Executing {','.join(s['action'] for s in sequence) if sequence else args.action} for {decision['day']} "
+          f"(Scheduled: {decision['scheduled'] or 'not scheduled, forced'})")
 
-    # Load Schedule
-    schedule_file = os.path.join(os.path.dirname(__file__), "..", "schedule.json")
-    try:
-        with open(schedule_file, 'r') as f:
-            schedule_config = json.load(f)
-    except FileNotFoundError:
-        print("Warning: schedule.json not found. Using defaults.")
-        schedule_config = {}
-
-    if not args.force:
-        # Validate Action for Today
-        today = date.today()
-        # 0-4 is Mon-Fri. 4 is Friday.
-        is_friday = today.weekday() == 4
-        
-        day_key = "friday" if is_friday else "mon_thu"
-        day_schedule = schedule_config.get(day_key, {})
-        
-        # Map CLI arg to JSON key
-        action_map = {
-            "START": "start",
-            "PAUSE": "break_start",
-            "RESUME": "break_end",
-            "END": "end"
-        }
-        
-        config_key = action_map.get(args.action)
-        if config_key:
-            if day_schedule.get(config_key) is None:
-                print(f"Action {args.action} is not scheduled for today ({day_key}). Skipping.")
-                sys.exit(0)
-            else:
-                print(f"Executing {args.action} for {day_key} (Scheduled: {day_schedule.get(config_key)})")
+    if args.accounts:
+        import batch_clock
+        failed = batch_clock.run_batch(args.accounts, args.action, headless=not args.visible, dry_run=is_simulation,
+                                       concurrency=args.concurrency or batch_clock.DEFAULT_CONCURRENCY,
+                                       use_session_cache=not args.no_session_cache,
+                                       resource_preset=args.resource_policy, use_journal=not args.recheck)
+        sys.exit(1 if failed else 0)
 
-    email = os.environ.get("BIXPE_EMAIL")
-    password = os.environ.get("BIXPE_PASSWORD")
+    email, password = get_credentials(args.visible)
 
-    if not email or not password:
-        # Fallback for local testing if env vars not set (remove in production!)
-        email = input("Enter Bixpe Email: ") if args.visible else None
-        password = input("Enter Bixpe Password: ") if args.visible else None
-    
-    if not email or not password:
-        print("Error: BIXPE_EMAIL and BIXPE_PASSWORD environment variables must be set.")
-        sys.exit(1)
+    if sequence:
+        results = sequence_runner.run_sequence(email, password, sequence, headless=not args.visible,
+                                               dry_run=is_simulation, use_session_cache=not args.no_session_cache,
+                                               resource_preset=args.resource_policy, use_journal=not args.recheck,
+                                               timezone_name=schedule_config.get("timezone", calendar_plan.DEFAULT_TIMEZONE))
+        sys.exit(0 if all(r["status"] in sequence_runner.OK_STATUSES for r in results) else 1)
+
+    if args.record_http:
+        import http_fastpath
+        if is_simulation:
+            print("Error: --record-http needs a real punch (a cancelled modal sends no request).")
+            sys.exit(1)
+        try:
+            http_fastpath.record(email, password, args.action, headless=not args.visible)
+        except http_fastpath.FastPathError as e:
+            print(f"Recording failed: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.http_fast:
+        import http_fastpath
+        try:
+            http_fastpath.run_fast_path(email, password, args.action, dry_run=is_simulation)
+            sys.exit(0)
+        except http_fastpath.FastPathError as e:
+            print(f"HTTP fast path unavailable ({e}). Falling back to the browser.")
+
+    timezone_name = schedule_config.get("timezone", calendar_plan.DEFAULT_TIMEZONE)
+    scheduled = args.arm_at or decision["scheduled"]
+    fire_at = None
+    if armed:
+        import arm_fire
+        if not scheduled:
+            print(f"[Arm] {args.action} has no scheduled time today; firing as soon as the page is ready.")
+        else:
+            fire_at = arm_fire.target_time(scheduled, timezone_name)
+            try:
+                arm_fire.wait_for_lead(fire_at, arm_fire.DEFAULT_LEAD_SECONDS if args.lead_time is None else args.lead_time)
+            except arm_fire.ArmError as e:
+                print(f"[Arm] Not arming: {e}.")
+                sys.exit(1)
 
-    run_automation(email, password, args.action, headless=not args.visible, dry_run=is_simulation)
+    # Retries (and arm staging) stop retry_policy.DEADLINE_MINUTES after the scheduled time, however late the trigger came
+    deadline = retry_policy.deadline_for(scheduled, timezone_name)
+    run_automation(email, password, args.action, headless=not args.visible, dry_run=is_simulation,
+                   use_session_cache=not args.no_session_cache, resource_preset=args.resource_policy,
+                   deadline=deadline, fire_at=fire_at)
 
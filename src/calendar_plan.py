@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import argparse
+from bisect import bisect_left
+from datetime import datetime, date, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCHEDULE_FILE = os.path.join(REPO_DIR, "schedule.json")
+HOLIDAYS_FILE = os.path.join(REPO_DIR, "holidays.json")
+OVERRIDES_FILE = os.path.join(REPO_DIR, "schedule_overrides.json")
+DEFAULT_TIMEZONE = "Europe/Madrid"
+
+ACTION_ORDER = ["START", "PAUSE", "RESUME", "END"]
+# Map CLI action to schedule.json key (lives here so the planner needs no browser imports)
+ACTION_SCHEDULE_KEYS = {"START": "start", "PAUSE": "break_start", "RESUME": "break_end", "END": "end"}
+# repository_dispatch event_type of each action (see the cron-job.org table in CHANGELOG.md)
+EVENT_TYPES = {"START": "clock_in", "PAUSE": "break_start", "RESUME": "break_end", "END": "clock_out"}
+
+
+def _load_json(json_path, default):
+    try:
+        with open(json_path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def load_overrides(json_path=OVERRIDES_FILE):
+    """Per-date overrides: {"YYYY-MM-DD": "off" | {"end": "14:00", "break_start": null, ...}}. Missing file -> {}."""
+    return _load_json(json_path, {})
+
+
+def day_schedule_key(day):
+    """schedule.json section for a date. 0-4 is Mon-Fri. 4 is Friday."""
+    return "friday" if day.weekday() == 4 else "mon_thu"
+
+
+def day_times(schedule_config, holidays, overrides, day):
+    """{action: "HH:MM"} for one date, or None if nothing runs that day.
+
+    Weekends and holidays never run. An override of "off" cancels a workday; a dict
+    override replaces the listed keys of that day's schedule (null removes the action).
+    """
+    day_str = day.strftime("%Y-%m-%d")
+    if day.weekday() >= 5 or day_str in holidays:
+        return None
+    override = overrides.get(day_str)
+    if override == "off":
+        return None
+    section = dict(schedule_config.get(day_schedule_key(day), {}))
+    if isinstance(override, dict):
+        section.update(override)
+    times = {}
+    for action in ACTION_ORDER:
+        hhmm = section.get(ACTION_SCHEDULE_KEYS[action])
+        if hhmm:
+            times[action] = hhmm
+    return times
+
+
+class CalendarPlan:
+    """Concrete, time-ordered (datetime, action) punch events with bisect lookups."""
+
+    def __init__(self, events, tz):
+        self.events = sorted(events, key=lambda event: event[0])
+        self.tz = tz
+        self._times = [due for due, _ in self.events]
+
+    def __len__(self):
+        return len(self.events)
+
+    def events_from(self, after, inclusive=True):
+        """Events at/after `after` (an aware datetime), in order."""
+        index = bisect_left(self._times, after)
+        if not inclusive:
+            while index < len(self._times) and self._times[index] == after:
+                index += 1
+        return self.events[index:]
+
+    def next_event(self, after, inclusive=False):
+        """(datetime, action) of the first event after `after`, or (None, None)."""
+        upcoming = self.events_from(after, inclusive)
+        return upcoming[0] if upcoming else (None, None)
+
+    def on_day(self, day):
+        start = datetime(day.year, day.month, day.day, tzinfo=self.tz)
+        return [(due, action) for due, action in self.events_from(start) if due.date() == day]
+
+    def to_triggers(self):
+        """Minimal trigger list: one entry per real punch, ready for an external dispatcher."""
+        return [{"at": due.isoformat(), "action": action, "event_type": EVENT_TYPES[action]}
+                for due, action in self.events]
+
+    def to_ical(self, calendar_name="Bixpe fichajes"):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//bixpe-bot//calendar_plan//ES",
+                 "CALSCALE:GREGORIAN", f"X-WR-CALNAME:{calendar_name}"]
+        for due, action in self.events:
+            utc = due.astimezone(timezone.utc)
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{due:%Y%m%d}-{action.lower()}@bixpe-bot",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART:{utc:%Y%m%dT%H%M%SZ}",
+                f"DTEND:{utc + timedelta(minutes=1):%Y%m%dT%H%M%SZ}",
+                f"SUMMARY:Bixpe {action}",
+                f"DESCRIPTION:event_type={EVENT_TYPES[action]}",
+                "END:VEVENT",
+            ]
+        lines.append("END:VCALENDAR")
+        return "\r\n".join(lines) + "\r\n"
+
+
+def compile_plan(schedule_config, holidays, overrides, start, end):
+    """Expands schedule + holidays + overrides into a CalendarPlan for start..end (dates, inclusive)."""
+    tz = ZoneInfo(schedule_config.get("timezone", DEFAULT_TIMEZONE))
+    holidays = set(holidays)
+    events = []
+    day = start
+    while day <= end:
+        for action, hhmm in (day_times(schedule_config, holidays, overrides, day) or {}).items():
+            hour, minute = (int(part) for part in hhmm.split(":"))
+            events.append((datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz), action))
+        day += timedelta(days=1)
+    return CalendarPlan(events, tz)
+
+
+def compile_from_files(start, end, schedule_file=SCHEDULE_FILE, holidays_file=HOLIDAYS_FILE,
+                       overrides_file=OVERRIDES_FILE):
+    return compile_plan(_load_json(schedule_file, {}), _load_json(holidays_file, []),
+                        load_overrides(overrides_file), start, end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile schedule.json + holidays.json + overrides into punch events")
+    parser.add_argument("--from", dest="start", help="First date (YYYY-MM-DD). Default: today")
+    parser.add_argument("--to", dest="end", help="Last date (YYYY-MM-DD). Default: 31 days after --from")
+    parser.add_argument("--format", choices=["text", "triggers", "ical"], default="text")
+    parser.add_argument("--next", nargs="?", const="now", metavar="ISO_DATETIME",
+                        help="Only print the next event after this instant (default: now)")
+    parser.add_argument("--output", help="Write to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.start:
+        start = date.fromisoformat(args.start)
+    elif args.next and args.next != "now":
+        start = datetime.fromisoformat(args.next).date()
+    else:
+        start = date.today()
+    end = date.fromisoformat(args.end) if args.end else start + timedelta(days=31)
+    plan = compile_from_files(start, end)
+
+    if args.next:
+        after = datetime.now(plan.tz) if args.next == "now" else datetime.fromisoformat(args.next)
+        if after.tzinfo is None:
+            after = after.replace(tzinfo=plan.tz)
+        due, action = plan.next_event(after)
+        if due is None:
+            print(f"No events until {end}.")
+            sys.exit(1)
+        print(f"{due.isoformat()} {action} ({EVENT_TYPES[action]})")
+        sys.exit(0)
+
+    if args.format == "triggers":
+        output = json.dumps(plan.to_triggers(), indent=2) + "\n"
+    elif args.format == "ical":
+        output = plan.to_ical()
+    else:
+        output = "".join(f"{due:%a %Y-%m-%d %H:%M %Z}  {action:<6} {EVENT_TYPES[action]}\n" for due, action in plan.events)
+        output += f"{len(plan)} events between {start} and {end}.\n"
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            f.write(output)
+        print(f"Wrote {len(plan)} events to {args.output}")
+    else:
+        sys.stdout.write(output)
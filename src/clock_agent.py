@@ -0,0 +1,160 @@
+import time
+
+import event_log
+
+CONFIRM_SELECTOR = "button.swal2-confirm, button.confirm"
+CANCEL_SELECTOR = "button.swal2-cancel, button.cancel"
+MODAL_SELECTOR = ".swal2-popup, .swal2-modal"
+OVERLAY_SELECTOR = "#processing-text"
+
+# Injected once per punch: diagnose, wait for the overlay, click, wait for the SweetAlert2
+# modal (MutationObserver) and confirm or cancel it, all inside the page. Resolves to one
+# structured result with in-page timings (ms), so the whole sequence is a single round trip.
+AGENT_JS = """async ({selector, modalButton, skipClick, overlaySelector, modalSelector, overlayTimeout, modalTimeout}) => {
+    const t0 = performance.now();
+    const timings = {};
+    const isShown = (el) => {
+        if (!el) return false;
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    // Resolves true as soon as check() holds (DOM mutations + 100 ms safety poll), false on timeout
+    const waitFor = (check, timeout) => new Promise(resolve => {
+        if (check()) return resolve(true);
+        let done = false;
+        const finish = (value) => {
+            if (done) return;
+            done = true;
+            observer.disconnect();
+            clearInterval(poll);
+            clearTimeout(timer);
+            resolve(value);
+        };
+        const observer = new MutationObserver(() => { if (check()) finish(true); });
+        observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+        const poll = setInterval(() => { if (check()) finish(true); }, 100);
+        const timer = setTimeout(() => finish(check()), timeout);
+    });
+    const mark = (name, since) => { timings[name] = performance.now() - since; return performance.now(); };
+
+    const el = document.querySelector(selector);
+    if (!el) {
+        const buttons = Array.from(document.querySelectorAll('button, a.btn, div.btn')).filter(isShown).map(b => ({
+            tag: b.tagName, id: b.id, className: String(b.className), text: (b.innerText || '').substring(0, 20).replace(/\\n/g, '')
+        }));
+        return {status: 'not_found', buttons, timings};
+    }
+
+    // Diagnostic checklist (same checks as the old pre-click evaluates)
+    let t = performance.now();
+    const rect = el.getBoundingClientRect();
+    const style = window.getComputedStyle(el);
+    const topEl = document.elementFromPoint(rect.left + rect.width / 2, rect.top + rect.height / 2);
+    const diagnostics = {
+        overlayVisible: isShown(document.querySelector(overlaySelector)),
+        tagName: el.tagName,
+        display: style.display,
+        visibility: style.visibility,
+        opacity: style.opacity,
+        rect: {x: rect.x, y: rect.y, width: rect.width, height: rect.height},
+        coveredBy: topEl ? (topEl.id || String(topEl.className) || topEl.tagName) : 'None',
+        intercepted: !!topEl && topEl !== el && !el.contains(topEl),
+    };
+    t = mark('diagnostics', t);
+
+    const overlayCleared = await waitFor(() => !isShown(document.querySelector(overlaySelector)), overlayTimeout);
+    t = mark('overlay_hidden', t);
+
+    // JS dispatch: the target is a DIV that tooltips/overlays may cover
+    if (skipClick) {
+        timings.total = performance.now() - t0;
+        return {status: 'simulated', diagnostics, overlayCleared, modal: {required: false}, timings};
+    }
+    el.click();
+    const clickedAt = Date.now();
+    t = mark('click', t);
+
+    const modal = {required: !!modalButton, shown: false, clicked: false};
+    if (modalButton) {
+        modal.shown = await waitFor(() => Array.from(document.querySelectorAll(modalSelector)).some(isShown), modalTimeout);
+        t = mark('modal_shown', t);
+        const btn = Array.from(document.querySelectorAll(modalButton)).find(b => b.offsetParent !== null);
+        if (btn) {
+            btn.click();
+            modal.clicked = true;
+        }
+        t = mark('confirmation', t);
+    }
+    timings.total = performance.now() - t0;
+    return {status: 'clicked', diagnostics, overlayCleared, modal, timings, clickedAt};
+}"""
+
+
+def _args(selector, confirm, simulate, overlay_timeout, modal_timeout):
+    modal_button = (CANCEL_SELECTOR if simulate else CONFIRM_SELECTOR) if confirm else None
+    # Without a modal to cancel, a simulated click would be a real punch
+    return {"selector": selector, "modalButton": modal_button, "skipClick": simulate and not confirm,
+            "overlaySelector": OVERLAY_SELECTOR, "modalSelector": MODAL_SELECTOR,
+            "overlayTimeout": overlay_timeout, "modalTimeout": modal_timeout}
+
+
+def run(page, selector, confirm, simulate=False, overlay_timeout=5000, modal_timeout=5000):
+    """Runs the agent for one action button. Adds "roundtrip_seconds" (evaluate wall time)."""
+    started = time.perf_counter()
+    result = page.evaluate(AGENT_JS, _args(selector, confirm, simulate, overlay_timeout, modal_timeout))
+    result["roundtrip_seconds"] = time.perf_counter() - started
+    return result
+
+
+async def run_async(page, selector, confirm, simulate=False, overlay_timeout=5000, modal_timeout=5000):
+    """Same as run() for async API pages (batch mode)."""
+    started = time.perf_counter()
+    result = await page.evaluate(AGENT_JS, _args(selector, confirm, simulate, overlay_timeout, modal_timeout))
+    result["roundtrip_seconds"] = time.perf_counter() - started
+    return result
+
+
+def clicked_at(result):
+    """Epoch seconds of the in-page click (None if the agent didn't click)."""
+    return result["clickedAt"] / 1000 if result.get("clickedAt") else None
+
+
+def record_timings(result, waits):
+    """Turns the in-page timings into spans; the CDP/evaluate overhead becomes "agent_roundtrip".
+
+    The wall-clock time of the click (epoch seconds) goes to waits.extra["clicked_at"].
+    """
+    timings = result.get("timings", {})
+    if clicked_at(result):
+        waits.extra["clicked_at"] = clicked_at(result)
+    for name in ("diagnostics", "overlay_hidden", "click", "modal_shown", "confirmation"):
+        if name in timings:
+            waits.add(name, timings[name] / 1000)
+    if "total" in timings:
+        waits.add("agent_roundtrip", max(0.0, result["roundtrip_seconds"] - timings["total"] / 1000))
+
+
+def print_report(result, selector):
+    """Logs the pre-click checklist to the event buffer and prints the click/modal outcome."""
+    d = result["diagnostics"]
+    event_log.log(f"[Check 1] Overlay '{OVERLAY_SELECTOR}' visible? {d['overlayVisible']}", level="debug")
+    event_log.log(f"[Check 2] Button Tag: {d['tagName']} (Expected: DIV or BUTTON)", level="debug")
+    event_log.log(f"[Check 3] Visibility: {d['display']} / {d['visibility']} / Opacity: {d['opacity']}", level="debug")
+    event_log.log(f"[Check 4] Dimensions: {d['rect']}", level="debug")
+    event_log.log(f"[Check 5] Element at Click Point: {d['coveredBy']}", level="debug")
+    if d["intercepted"]:
+        print(f"WARNING: Button might be covered by '{d['coveredBy']}'!")
+    if not result["overlayCleared"]:
+        print(f"Overlay '{OVERLAY_SELECTOR}' still visible after the wait; clicked anyway (JS dispatch).")
+    if result["status"] == "simulated":
+        print(f"[SIMULATION] Click on {selector} skipped (no confirmation dialog to cancel).")
+    else:
+        print(f"JS click sent on: {selector}")
+    modal = result["modal"]
+    if modal["required"]:
+        if not modal["shown"]:
+            print("Confirmation modal did not show up in time.")
+        print("Confirmation dialog clicked." if modal["clicked"] else "No confirmation dialog button found.")
+    timings = " | ".join(f"{k}={v:.0f}ms" for k, v in result["timings"].items())
+    print(f"[Agent] {timings} | roundtrip={result['roundtrip_seconds'] * 1000:.0f}ms")
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+import artifacts
+
+# Browser and bot events of a run go into a bounded ring buffer instead of stdout. A failed
+# run dumps the whole buffer (stdout + artifacts/); a successful one prints a one-line summary.
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+CAPACITY = int(os.environ.get("BIXPE_EVENT_BUFFER", "500"))
+# Stream events at or above this level as they happen ("debug" while developing); off by default
+ECHO_LEVEL = os.environ.get("BIXPE_EVENT_ECHO", "off")
+# Per source: at most RATE_BURST events, refilled at RATE_PER_SECOND; the rest are only counted (except errors)
+RATE_PER_SECOND = 10
+RATE_BURST = 50
+
+# Console message types -> level
+CONSOLE_LEVELS = {"error": "error", "assert": "error", "warning": "warning"}
+# Requests the resource policy aborted on purpose
+BLOCKED_FAILURES = ("ERR_BLOCKED_BY_CLIENT",)
+
+
+class EventSink:
+    """Leveled ring buffer with collapsing of consecutive repeats and per-source rate limiting."""
+
+    def __init__(self, capacity=None):
+        self.events = deque(maxlen=capacity or CAPACITY)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.events.clear()
+            self.counts = {}
+            self.collapsed = 0
+            self.dropped = 0
+            self.buckets = {}
+            self.started = time.time()
+
+    def _allow(self, source, now):
+        tokens, last = self.buckets.get(source, (RATE_BURST, now))
+        tokens = min(RATE_BURST, tokens + (now - last) * RATE_PER_SECOND)
+        if tokens < 1:
+            self.buckets[source] = (tokens, now)
+            return False
+        self.buckets[source] = (tokens - 1, now)
+        return True
+
+    def emit(self, source, level, message):
+        now = time.time()
+        with self.lock:
+            self.counts[(source, level)] = self.counts.get((source, level), 0) + 1
+            last = self.events[-1] if self.events else None
+            if last and last["source"] == source and last["message"] == message:
+                last["repeat"] += 1
+                last["last_ts"] = now
+                self.collapsed += 1
+                return
+            # Errors are never rate-limited: they are what a failure dump is for
+            if LEVELS.get(level, 0) < LEVELS["error"] and not self._allow(source, now):
+                self.dropped += 1
+                return
+            self.events.append({"ts": now, "last_ts": now, "source": source, "level": level,
+                                "message": message, "repeat": 1})
+        if LEVELS.get(level, 0) >= LEVELS.get(ECHO_LEVEL, 100):
+            print(f"[Event] {source} {level}: {message}")
+
+    def attach(self, page, tag=""):
+        """Routes a page's console and failed requests into the sink (once per page)."""
+        if getattr(page, "_event_sink_attached", False):
+            return
+        page._event_sink_attached = True
+        console_source = f"console{tag}"
+        request_source = f"requestfailed{tag}"
+
+        def on_console(msg):
+            self.emit(console_source, CONSOLE_LEVELS.get(msg.type, "debug"), msg.text)
+
+        def on_request_failed(request):
+            failure = request.failure or ""
+            level = "debug" if any(marker in failure for marker in BLOCKED_FAILURES) else "warning"
+            self.emit(request_source, level, f"{request.url} - {failure}")
+
+        page.on("console", on_console)
+        page.on("requestfailed", on_request_failed)
+
+    def summary(self):
+        """Compact one-liner for successful runs."""
+        by_source = {}
+        by_level = {}
+        for (source, level), count in self.counts.items():
+            by_source[source] = by_source.get(source, 0) + count
+            by_level[level] = by_level.get(level, 0) + count
+        sources = ", ".join(f"{source} {count}" for source, count in sorted(by_source.items())) or "none"
+        print(f"[Events] {sum(by_source.values())} events ({sources}); "
+              f"{by_level.get('warning', 0)} warnings, {by_level.get('error', 0)} errors; "
+              f"{self.collapsed} repeats collapsed, {self.dropped} rate-limited.")
+
+    def flush(self, name=None):
+        """Failure path: prints the buffer and queues it as name_<ts>.jsonl in artifacts/."""
+        with self.lock:
+            events = list(self.events)
+        print(f"\n--- EVENT LOG ({len(events)} buffered, {self.collapsed} repeats collapsed, "
+              f"{self.dropped} rate-limited) ---")
+        for event in events:
+            repeat = f" (x{event['repeat']})" if event["repeat"] > 1 else ""
+            print(f"{time.strftime('%H:%M:%S', time.localtime(event['ts']))} "
+                  f"{event['source']:<14} {event['level']:<7} {event['message']}{repeat}")
+        print("---------------------------------------\n")
+        if name:
+            artifacts.save_text(name, "".join(json.dumps(event) + "\n" for event in events), suffix=".jsonl")
+
+
+# One sink per process: runs reset it at the start and flush or summarize it at the end
+SINK = EventSink()
+
+
+def log(message, level="info", source="bot"):
+    """Records a bot diagnostic in the buffer (stdout only when echo is on or the run fails)."""
+    SINK.emit(source, level, message)
+
+
+def attach(page, tag=""):
+    SINK.attach(page, tag)
+
+
+def finish(failed, name=None):
+    """End of a run: full dump when it failed, summary line otherwise. Resets the buffer."""
+    if failed:
+        SINK.flush(name)
+    else:
+        SINK.summary()
+    SINK.reset()
@@ -0,0 +1,381 @@
+import os
+import re
+import json
+import time
+import http.client
+from http.cookies import SimpleCookie
+from urllib.parse import urlparse, urljoin, parse_qsl, urlencode, quote, quote_plus
+
+import bixpe_bot
+import session_cache
+import punch_journal
+import readiness
+import run_metrics
+
+RECIPE_FILE = os.path.join(session_cache.CACHE_DIR, "http_recipe.json")
+
+# Form fields / headers carrying anti-forgery tokens (ASP.NET, Laravel, generic CSRF)
+TOKEN_NAME_PATTERN = re.compile(r"(?i)(requestverificationtoken|csrf|xsrf|^_token$)")
+# Request headers worth replaying; everything else is rebuilt by the client
+REPLAY_HEADERS = ("content-type", "accept", "x-requested-with")
+
+_TOKEN_INPUT_RE = re.compile(r"<input[^>]*name=[\"'](?P<name>[^\"']*(?:RequestVerificationToken|csrf|_token)[^\"']*)[\"'][^>]*>", re.I)
+_VALUE_ATTR_RE = re.compile(r"value=[\"'](?P<value>[^\"']*)[\"']", re.I)
+_TOKEN_META_RE = re.compile(r"<meta[^>]*name=[\"'](?:csrf-token|_token)[\"'][^>]*content=[\"'](?P<value>[^\"']*)[\"']", re.I)
+
+
+class FastPathError(Exception):
+    """The HTTP fast path cannot be used (no recipe) or Bixpe answered differently than recorded."""
+
+
+# ---------------------------------------------------------------------------
+# RECORDER: captures the requests a real browser punch sends
+# ---------------------------------------------------------------------------
+
+def _credential_forms(email, password):
+    """(text, placeholder) pairs, longest first: plain and URL-encoded credentials."""
+    forms = {}
+    for name, value in (("email", email), ("password", password)):
+        if not value:
+            continue
+        forms[value] = "{{%s}}" % name
+        for encoded in (quote_plus(value), quote(value, safe="")):
+            if encoded != value:
+                forms[encoded] = "{{%s_url}}" % name
+    return sorted(forms.items(), key=lambda item: -len(item[0]))
+
+
+def _template_text(text, email, password):
+    for value, placeholder in _credential_forms(email, password):
+        text = text.replace(value, placeholder)
+    return text
+
+
+def _template_value(name, value, email, password):
+    """Templates credentials anywhere in a (possibly nested) value; token fields become {{token}}."""
+    if isinstance(value, dict):
+        return {k: _template_value(k, v, email, password) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_template_value(name, v, email, password) for v in value]
+    if not isinstance(value, str):
+        return value
+    if value not in (email, password) and TOKEN_NAME_PATTERN.search(name):
+        return "{{token}}"
+    return _template_text(value, email, password)
+
+
+def _template_body(request, email, password):
+    data = request.post_data
+    if not data:
+        return None
+    content_type = request.headers.get("content-type", "")
+    if "application/x-www-form-urlencoded" in content_type:
+        return {"form": [[k, _template_value(k, v, email, password)] for k, v in parse_qsl(data, keep_blank_values=True)]}
+    if "json" in content_type:
+        try:
+            return {"json": _template_value("", json.loads(data), email, password)}
+        except ValueError:
+            pass
+    return {"raw": _template_text(data, email, password)}
+
+
+def leaks_credentials(recipe, email, password):
+    """True if any plain or URL-encoded credential survived templating (recipe must not be written)."""
+    text = json.dumps(recipe)
+    return any(value in text or json.dumps(value)[1:-1] in text for value, _ in _credential_forms(email, password))
+
+
+def _success_shape(response):
+    shape = {"status": response.status}
+    location = response.headers.get("location")
+    if location:
+        shape["location"] = urlparse(location).path
+    if "json" in response.headers.get("content-type", ""):
+        try:
+            body = response.json()
+        except Exception:
+            body = None
+        if isinstance(body, dict):
+            shape["json_keys"] = sorted(body.keys())
+            shape["json_flags"] = {k: v for k, v in body.items() if isinstance(v, bool)}
+    return shape
+
+
+class RequestRecorder:
+    """Collects non-GET document/XHR requests to the Bixpe host, tagged by phase."""
+
+    def __init__(self, host):
+        self.host = host
+        self.phase = None
+        self.page = None
+        self.captured = []
+
+    def on_response(self, response):
+        request = response.request
+        if self.phase is None or request.method == "GET" \
+                or request.resource_type not in ("document", "xhr", "fetch") \
+                or urlparse(request.url).hostname != self.host:
+            return
+        self.captured.append((self.phase, self.page.url if self.page else "", response))
+
+    def steps(self, phase, email, password):
+        steps = []
+        for step_phase, page_url, response in self.captured:
+            if step_phase != phase:
+                continue
+            request = response.request
+            url = urlparse(request.url)
+            steps.append({
+                "page": urlparse(page_url).path or "/",
+                "method": request.method,
+                "path": _template_text(url.path + (f"?{url.query}" if url.query else ""), email, password),
+                "headers": {k: ("{{token}}" if TOKEN_NAME_PATTERN.search(k) else _template_text(v, email, password))
+                            for k, v in request.headers.items()
+                            if k in REPLAY_HEADERS or TOKEN_NAME_PATTERN.search(k)},
+                "body": _template_body(request, email, password),
+                "success": _success_shape(response),
+            })
+        return steps
+
+
+def load_recipe(recipe_path=RECIPE_FILE):
+    try:
+        with open(recipe_path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def record(email, password, action, headless=True, recipe_path=RECIPE_FILE):
+    """Performs a REAL punch in the browser and stores the login + action requests it sent.
+
+    Raises FastPathError if the browser run fails or the credentials can't be templated out.
+    """
+    from playwright.sync_api import sync_playwright
+
+    host = urlparse(bixpe_bot.BIXPE_URL).hostname
+    recorder = RequestRecorder(host)
+    waits = readiness.WaitLog()
+    started = time.perf_counter()
+    p = sync_playwright().start()
+    try:
+        browser = bixpe_bot.launch_browser(p, headless=headless)
+        context = bixpe_bot.new_bixpe_context(browser)  # No cached session: the login must be captured
+        context.on("response", recorder.on_response)
+        page = bixpe_bot.open_bixpe_page(context)
+        recorder.page = page
+
+        recorder.phase = "login"
+        bixpe_bot.login(page, email, password)
+        all_selectors = [sel for sels in bixpe_bot.ACTION_SELECTORS.values() for sel in sels]
+        readiness.wait_for_action_ready(page, bixpe_bot.ACTION_SELECTORS[action][0], all_selectors)
+
+        recorder.phase = "action"
+        outcome = bixpe_bot.perform_action(page, action, waits=waits)
+        recorder.phase = None
+        login_steps = recorder.steps("login", email, password)
+        action_steps = recorder.steps("action", email, password)  # Reads bodies while the browser is alive
+        browser.close()
+    except Exception as e:
+        raise FastPathError(f"Browser run failed: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+    finally:
+        p.stop()
+    # A real punch like any other: later triggers must see it
+    punch_journal.record(email, action, outcome, waits.extra.get("dashboard_state"),
+                         latency_seconds=time.perf_counter() - started, mode="record-http")
+
+    if outcome != "DONE" or not action_steps:
+        raise FastPathError(f"Nothing to record for {action} (outcome {outcome}, {len(action_steps)} requests)")
+    if not login_steps:
+        raise FastPathError("Login request was not captured")
+
+    recipe = load_recipe(recipe_path)
+    recipe.update({"base_url": bixpe_bot.BIXPE_URL, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "login": login_steps})
+    recipe.setdefault("actions", {})[action] = action_steps
+    if leaks_credentials(recipe, email, password):
+        raise FastPathError("Credentials could not be templated out of the recorded requests; recipe not written")
+    os.makedirs(os.path.dirname(recipe_path) or ".", exist_ok=True)
+    tmp_path = recipe_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(recipe, f, indent=2)
+    os.chmod(tmp_path, 0o600)  # Same protection as the session cache
+    os.replace(tmp_path, recipe_path)
+    print(f"Recorded {len(login_steps)} login + {len(action_steps)} {action} request(s) into {recipe_path}")
+    return recipe
+
+
+# ---------------------------------------------------------------------------
+# REPLAY: lightweight HTTP client with one kept-alive connection
+# ---------------------------------------------------------------------------
+
+def extract_token(html):
+    match = _TOKEN_INPUT_RE.search(html)
+    if match:
+        value = _VALUE_ATTR_RE.search(match.group(0))
+        if value:
+            return value.group("value")
+    match = _TOKEN_META_RE.search(html)
+    return match.group("value") if match else None
+
+
+def _fill(value, values):
+    if isinstance(value, str):
+        return re.sub(r"\{\{(\w+)\}\}", lambda m: values.get(m.group(1)) or "", value)
+    if isinstance(value, dict):
+        return {k: _fill(v, values) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, values) for v in value]
+    return value
+
+
+def matches_success(shape, status, headers, body):
+    """True if a replayed response has the same shape as the recorded successful one."""
+    if status != shape["status"]:
+        return False
+    if "location" in shape and urlparse(headers.get("Location", "")).path != shape["location"]:
+        return False
+    if "json_keys" in shape:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return False
+        if not isinstance(payload, dict) or not set(shape["json_keys"]) <= set(payload):
+            return False
+        if any(payload.get(k) != v for k, v in shape.get("json_flags", {}).items()):
+            return False
+    return True
+
+
+class HttpClockClient:
+    """Minimal cookie-aware HTTP/1.1 client reusing one keep-alive connection."""
+
+    def __init__(self, base_url, timeout=15):
+        parsed = urlparse(base_url)
+        self.base_url = base_url
+        self.https = parsed.scheme == "https"
+        self.netloc = parsed.netloc
+        self.timeout = timeout
+        self.cookies = {}
+        self.conn = None
+        self.requests_sent = 0
+
+    def _connection(self):
+        if self.conn is None:
+            conn_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.conn = conn_class(self.netloc, timeout=self.timeout)
+        return self.conn
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        """Returns (status, headers, body_text). Retries once if the kept-alive socket was closed."""
+        all_headers = {
+            "User-Agent": bixpe_bot.CONTEXT_OPTIONS["user_agent"],
+            "Accept-Language": "es-ES,es;q=0.9",
+            "Connection": "keep-alive",
+        }
+        all_headers.update(headers or {})
+        if self.cookies:
+            all_headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+
+        for attempt in (1, 2):
+            try:
+                conn = self._connection()
+                conn.request(method, path, body=body, headers=all_headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt == 2:
+                    raise
+        self.requests_sent += 1
+
+        for header in response.headers.get_all("Set-Cookie") or []:
+            cookie = SimpleCookie()
+            cookie.load(header)
+            for name, morsel in cookie.items():
+                self.cookies[name] = morsel.value
+        return response.status, response.headers, data.decode("utf-8", errors="replace")
+
+    def get_page(self, path, max_redirects=5):
+        """GETs a page following redirects. Returns (final_path, html)."""
+        for _ in range(max_redirects + 1):
+            status, headers, html = self.request("GET", path, headers={"Accept": "text/html"})
+            if status in (301, 302, 303, 307, 308) and headers.get("Location"):
+                target = urlparse(urljoin(self.base_url, headers["Location"]))
+                path = target.path + (f"?{target.query}" if target.query else "")
+                continue
+            return path, html
+        raise FastPathError(f"Too many redirects fetching {path}")
+
+    def replay(self, step, values):
+        """Sends one recorded step with fresh token/credentials; raises FastPathError on shape mismatch."""
+        _, html = self.get_page(step["page"])
+        values = dict(values, token=extract_token(html) or self.cookies.get("XSRF-TOKEN", ""))
+        headers = _fill(step["headers"], values)
+        body = step["body"]
+        if body is None:
+            payload = None
+        elif "form" in body:
+            payload = urlencode([(k, _fill(v, values)) for k, v in body["form"]])
+        elif "json" in body:
+            payload = json.dumps(_fill(body["json"], values))
+        else:
+            payload = _fill(body["raw"], values)
+
+        status, resp_headers, resp_body = self.request(step["method"], _fill(step["path"], values), body=payload,
+                                                       headers=headers)
+        if not matches_success(step["success"], status, resp_headers, resp_body):
+            raise FastPathError(f"{step['method']} {step['path']} answered {status}, "
+                                f"expected shape {step['success']}")
+        return status
+
+
+def run_fast_path(email, password, action, dry_run=False, recipe_path=RECIPE_FILE):
+    """Logs in and punches with plain HTTP requests. Raises FastPathError so callers can fall back."""
+    recipe = load_recipe(recipe_path)
+    if not recipe.get("login") or not recipe.get("actions", {}).get(action):
+        raise FastPathError(f"No recorded requests for {action} (run with --record-http first)")
+
+    started = time.perf_counter()
+    metrics = run_metrics.RunMetrics(action, mode="http", sample_rss=False)
+    client = HttpClockClient(recipe.get("base_url") or bixpe_bot.BIXPE_URL)
+    values = {"email": email, "password": password,
+              "email_url": quote_plus(email), "password_url": quote_plus(password)}
+    try:
+        with metrics.span("http_login"):
+            for step in recipe["login"]:
+                client.replay(step, values)
+        login_seconds = time.perf_counter() - started
+
+        with metrics.span("http_action"):
+            if dry_run:
+                for step in recipe["actions"][action]:
+                    client.get_page(step["page"])
+                    print(f"[SIMULATION] Would send {step['method']} {step['path']} for {action}.")
+                outcome = "SIMULATED"
+            else:
+                for step in recipe["actions"][action]:
+                    client.replay(step, values)
+                outcome = "DONE"
+    except (OSError, http.client.HTTPException) as e:
+        metrics.record("FASTPATH_FAILED")
+        raise FastPathError(f"HTTP error: {e}")
+    except FastPathError:
+        metrics.record("FASTPATH_FAILED")
+        raise
+    finally:
+        client.close()
+    metrics.extra["requests"] = client.requests_sent
+    metrics.record(outcome)
+    punch_journal.record(email, action, outcome, latency_seconds=time.perf_counter() - started, mode="http")
+
+    total = time.perf_counter() - started
+    print(f"[FastPath] {action} -> {outcome} in {total * 1000:.0f} ms "
+          f"(login {login_seconds * 1000:.0f} ms, {client.requests_sent} requests, 1 connection).")
+    return {"status": outcome, "seconds": total, "requests": client.requests_sent}
@@ -0,0 +1,66 @@
+import os
+
+# Chromium launch profiles. "default" is the historical setup; "lean" trims Chromium for
+# small shared runners running many sessions at once.
+PROFILES = {
+    "default": {
+        "args": [],
+        "context": {},
+        "headless_only": False,
+    },
+    "lean": {
+        # Playwright already passes some of these; listing them keeps the profile explicit
+        "args": [
+            "--disable-gpu",
+            "--disable-extensions",
+            "--disable-component-extensions-with-background-pages",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--no-first-run",
+            "--mute-audio",
+            "--disable-dev-shm-usage",  # /dev/shm is tiny in containers
+            # One renderer process for all pages (--single-process is not stable enough to use)
+            "--renderer-process-limit=1",
+            # Keep the Google Maps iframe in Bixpe's renderer instead of a separate one
+            "--disable-site-isolation-trials",
+            "--disk-cache-size=16777216",
+            "--media-cache-size=1048576",
+        ],
+        "context": {"viewport": {"width": 1024, "height": 640}, "device_scale_factor": 1},
+        # headless=True runs Playwright's chromium-headless-shell build, not the full browser
+        "headless_only": True,
+    },
+}
+
+# Read at call time, so --launch-profile (and benchmark.py) can switch it for the whole run
+ACTIVE_PROFILE = os.environ.get("BIXPE_LAUNCH_PROFILE", "default")
+
+
+def get_profile(name=None):
+    name = name or ACTIVE_PROFILE
+    if name not in PROFILES:
+        print(f"Warning: unknown launch profile '{name}'. Using 'default'.")
+        name = "default"
+    return name, PROFILES[name]
+
+
+def launch_options(base, headless=True, name=None):
+    """Keyword arguments for chromium.launch(): base options plus the profile's flags."""
+    name, profile = get_profile(name)
+    if profile["headless_only"] and not headless:
+        print(f"[Launch] Profile '{name}' is headless-only; ignoring the visible browser request.")
+        headless = True
+    options = dict(base)
+    options["args"] = list(base.get("args", [])) + [arg for arg in profile["args"] if arg not in base.get("args", [])]
+    options["headless"] = headless
+    return options
+
+
+def context_options(base, name=None):
+    """Keyword arguments for browser.new_context(): base options with the profile's overrides."""
+    _, profile = get_profile(name)
+    options = dict(base)
+    options.update(profile["context"])
+    return options
@@ -0,0 +1,118 @@
+import os
+import json
+import time
+from urllib.parse import urlparse
+
+import session_cache
+
+LEARNED_FILE_NAME = "login_selectors.json"
+RESOLVE_TIMEOUT_MS = 10000
+ROLES = ("email", "password", "submit")
+
+# One in-page pass over every candidate of every role. Resolves to {role: selector|null}
+# once the email and password fields are visible, and to null (keep polling) before that.
+# "text=..." candidates are Playwright text selectors, matched here against clickable elements.
+RESOLVE_JS = """(candidates) => {
+    const isShown = (el) => {
+        if (!el) return false;
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    const matches = (sel) => {
+        if (sel.startsWith('text=')) {
+            const text = sel.slice(5).replace(/^["']|["']$/g, '').trim();
+            return Array.from(document.querySelectorAll('button, a, input[type="submit"], [role="button"]'))
+                .filter(el => (el.innerText || el.value || '').trim().includes(text));
+        }
+        try { return Array.from(document.querySelectorAll(sel)); } catch (e) { return []; }
+    };
+    const found = {};
+    for (const [role, selectors] of Object.entries(candidates)) {
+        found[role] = selectors.find(sel => matches(sel).some(isShown)) || null;
+    }
+    return (found.email && found.password) ? found : null;
+}"""
+
+
+def _learned_path():
+    return os.path.join(session_cache.CACHE_DIR, LEARNED_FILE_NAME)
+
+
+def load_learned(host):
+    """{role: selector} that won last time on this host ({} if none)."""
+    try:
+        with open(_learned_path(), "r") as f:
+            return json.load(f).get(host, {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_learned(host, winners):
+    path = _learned_path()
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data[host] = {role: sel for role, sel in winners.items() if sel}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"Warning: could not save learned login selectors: {e}")
+
+
+def candidates(fallbacks, learned):
+    """Selector lists per role with the learned winner tried first."""
+    ordered = {}
+    for role in ROLES:
+        learned_sel = learned.get(role)
+        ordered[role] = ([learned_sel] if learned_sel else []) + [s for s in fallbacks[role] if s != learned_sel]
+    return ordered
+
+
+def _finish(host, winners, learned, started):
+    """Logs the winners, persists them if they changed and returns them."""
+    elapsed = time.perf_counter() - started
+    parts = []
+    for role in ROLES:
+        sel = winners.get(role)
+        tag = " (learned)" if sel and sel == learned.get(role) else ""
+        parts.append(f"{role}={sel or '-'}{tag}")
+    print(f"[Login] Selectors resolved in {elapsed:.2f}s: {', '.join(parts)}")
+    if any(winners.get(role) != learned.get(role) for role in ROLES if winners.get(role)):
+        save_learned(host, winners)
+    return winners
+
+
+def resolve(page, fallbacks, timeout=RESOLVE_TIMEOUT_MS):
+    """Returns {role: selector} for email/password/submit in one polled page evaluation.
+
+    Returns None if the email/password fields never become visible.
+    """
+    host = urlparse(page.url).hostname or ""
+    learned = load_learned(host)
+    started = time.perf_counter()
+    try:
+        handle = page.wait_for_function(RESOLVE_JS, arg=candidates(fallbacks, learned), timeout=timeout, polling=100)
+    except Exception:
+        print(f"[Login] No visible login form after {time.perf_counter() - started:.2f}s")
+        return None
+    return _finish(host, handle.json_value(), learned, started)
+
+
+async def resolve_async(page, fallbacks, timeout=RESOLVE_TIMEOUT_MS):
+    """Same as resolve() for async API pages (batch mode)."""
+    host = urlparse(page.url).hostname or ""
+    learned = load_learned(host)
+    started = time.perf_counter()
+    try:
+        handle = await page.wait_for_function(RESOLVE_JS, arg=candidates(fallbacks, learned), timeout=timeout,
+                                              polling=100)
+    except Exception:
+        print(f"[Login] No visible login form after {time.perf_counter() - started:.2f}s")
+        return None
+    return _finish(host, await handle.json_value(), learned, started)
@@ -0,0 +1,300 @@
+import json
+import time
+import random
+import secrets
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from http.cookies import SimpleCookie
+from urllib.parse import urlparse, parse_qs
+
+# Workday state machine (mirrors what the dashboard offers in each state)
+TRANSITIONS = {
+    "start": ({"NOT_STARTED", "ENDED"}, "WORKING"),
+    "pause": ({"WORKING"}, "PAUSED"),
+    "resume": ({"PAUSED"}, "WORKING"),
+    "stop": ({"WORKING"}, "ENDED"),
+}
+VISIBLE_BUTTONS = {
+    "NOT_STARTED": ["btn-start-workday"],
+    "WORKING": ["btn-pause-lunch", "btn-stop-workday"],
+    "PAUSED": ["btn-resume-workday"],
+    "ENDED": ["btn-start-workday"],
+}
+BUTTONS = [
+    ("btn-start-workday", "start", "Iniciar jornada", True),
+    ("btn-pause-lunch", "pause", "Pausa comida", False),
+    ("btn-resume-workday", "resume", "Reanudar", False),
+    ("btn-stop-workday", "stop", "Finalizar jornada", True),
+]
+
+
+class MockConfig:
+    """Latency, overlay timing and failure injection knobs."""
+
+    def __init__(self, latency_ms=0, overlay_ms=600, render_ms=300, fail_rate=0.0, fail_login=False,
+                 missing_button=None, stuck_overlay=False, session_ttl_s=None):
+        self.latency_ms = latency_ms
+        self.overlay_ms = overlay_ms
+        self.render_ms = render_ms
+        self.fail_rate = fail_rate
+        self.fail_login = fail_login
+        self.missing_button = missing_button
+        self.stuck_overlay = stuck_overlay
+        self.session_ttl_s = session_ttl_s
+
+
+class MockState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}   # sid -> (email, created_at, token)
+        self.workday = {}    # email -> state
+        self.tokens = set()  # anti-forgery tokens issued by the login page
+        self.punches = []    # (timestamp, email, action, status)
+        self.requests = 0
+
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>Bixpe Worktime - Login</title>
+<style>
+ body {{ font-family: sans-serif; }}
+ #cookie-banner {{ position: fixed; bottom: 0; left: 0; right: 0; padding: 12px; background: #333; color: #fff; }}
+ form {{ width: 320px; margin: 80px auto; display: flex; flex-direction: column; gap: 8px; }}
+</style></head>
+<body>
+<form method="post" action="/Account/Login">
+  <input type="hidden" name="__RequestVerificationToken" value="{token}">
+  <input id="emailLogin" name="Username" type="email" placeholder="Email">
+  <input id="passwordLogin" name="Password" type="password" placeholder="Contraseña">
+  <button id="btn-loginSubmit" type="submit">Iniciar sesión</button>
+  {error}
+</form>
+{cookie_banner}
+</body></html>"""
+
+COOKIE_BANNER = """<div id="cookie-banner">Usamos cookies.
+  <button id="cookie-accept" onclick="document.cookie='cookies_ok=1; path=/'; document.getElementById('cookie-banner').remove()">Aceptar todas</button>
+</div>"""
+
+DASHBOARD_PAGE = """<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>Bixpe Worktime</title>
+<style>
+ body {{ font-family: sans-serif; margin: 0; }}
+ #widget {{ display: flex; gap: 12px; padding: 40px; }}
+ .btn {{ display: none; padding: 18px 24px; background: #1a73e8; color: #fff; border-radius: 6px; cursor: pointer; }}
+ #processing-text {{ display: none; position: fixed; inset: 0; background: rgba(255,255,255,.85); z-index: 100; padding-top: 200px; text-align: center; }}
+ .swal2-container {{ display: none; position: fixed; inset: 0; background: rgba(0,0,0,.4); z-index: 200; align-items: center; justify-content: center; }}
+ .swal2-popup {{ background: #fff; padding: 24px; border-radius: 8px; }}
+</style></head>
+<body>
+<h1>Control horario</h1>
+<input type="hidden" name="__RequestVerificationToken" value="{token}">
+<div id="widget">{buttons}</div>
+<div id="processing-text">Procesando...</div>
+<div class="swal2-container"><div class="swal2-popup swal2-modal" role="dialog">
+  <h2 class="swal2-title">¿Estás seguro?</h2>
+  <button type="button" class="swal2-confirm">Sí</button>
+  <button type="button" class="swal2-cancel">Cancelar</button>
+</div></div>
+<script>
+const TOKEN = document.querySelector('input[name="__RequestVerificationToken"]').value;
+const VISIBLE = {visible};
+const OVERLAY_MS = {overlay_ms};
+const RENDER_MS = {render_ms};
+const STUCK_OVERLAY = {stuck_overlay};
+let state = {state};
+const overlay = document.getElementById('processing-text');
+const modal = document.querySelector('.swal2-container');
+
+function render() {{
+  document.querySelectorAll('#widget .btn').forEach(b => {{
+    b.style.display = VISIBLE[state].includes(b.id) ? 'inline-block' : 'none';
+  }});
+}}
+function processing(ms, done) {{
+  overlay.style.display = 'block';
+  if (STUCK_OVERLAY) return;
+  setTimeout(() => {{ overlay.style.display = 'none'; if (done) done(); }}, ms);
+}}
+function swal(onConfirm) {{
+  modal.style.display = 'flex';
+  modal.querySelector('.swal2-confirm').onclick = () => {{ modal.style.display = 'none'; onConfirm(); }};
+  modal.querySelector('.swal2-cancel').onclick = () => {{ modal.style.display = 'none'; }};
+}}
+function send(action) {{
+  overlay.style.display = 'block';
+  fetch('/api/workday/' + action, {{
+    method: 'POST',
+    headers: {{ 'Content-Type': 'application/json', 'X-Requested-With': 'XMLHttpRequest', 'RequestVerificationToken': TOKEN }},
+    body: JSON.stringify({{ latitude: 41.6513, longitude: -0.9346 }})
+  }}).then(r => r.json()).then(data => {{
+    if (data.success) {{ state = data.state; }} else {{ console.error('Clock action failed: ' + action); }}
+    processing(OVERLAY_MS, render);
+  }});
+}}
+document.querySelectorAll('#widget .btn').forEach(b => {{
+  b.addEventListener('click', () => b.dataset.confirm === '1' ? swal(() => send(b.dataset.action)) : send(b.dataset.action));
+}});
+overlay.style.display = 'block';
+setTimeout(() => processing(OVERLAY_MS, render), RENDER_MS);
+</script>
+</body></html>"""
+
+
+def make_handler(config, state):
+    class MockBixpeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real site
+        disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+        def log_message(self, fmt, *args):
+            pass  # Keep benchmark output clean
+
+        # -- helpers --------------------------------------------------------
+        def _cookies(self):
+            cookie = SimpleCookie(self.headers.get("Cookie", ""))
+            return {k: m.value for k, m in cookie.items()}
+
+        def _session(self):
+            sid = self._cookies().get("BixpeSession")
+            with state.lock:
+                session = state.sessions.get(sid)
+                if session and config.session_ttl_s and time.time() - session[1] > config.session_ttl_s:
+                    del state.sessions[sid]
+                    return None
+            return session
+
+        def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _json(self, status, payload):
+            self._send(status, json.dumps(payload), "application/json; charset=utf-8")
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return self.rfile.read(length).decode("utf-8") if length else ""
+
+        def _delay(self):
+            with state.lock:
+                state.requests += 1
+            if config.latency_ms:
+                time.sleep(config.latency_ms / 1000)
+
+        # -- routes ---------------------------------------------------------
+        def do_GET(self):
+            self._delay()
+            path = urlparse(self.path).path
+            if path == "/__state":
+                with state.lock:
+                    return self._json(200, {"workday": state.workday, "punches": state.punches,
+                                            "requests": state.requests})
+            if path != "/":
+                return self._send(404, "Not found")
+
+            session = self._session()
+            if not session:
+                token = secrets.token_urlsafe(16)
+                with state.lock:
+                    state.tokens.add(token)
+                banner = "" if self._cookies().get("cookies_ok") else COOKIE_BANNER
+                return self._send(200, LOGIN_PAGE.format(token=token, error="", cookie_banner=banner))
+
+            email, _, token = session
+            with state.lock:
+                current = state.workday.setdefault(email, "NOT_STARTED")
+            buttons = "".join(
+                f'<div id="{bid}" class="btn" data-action="{action}" data-confirm="{1 if confirm else 0}">{label}</div>'
+                for bid, action, label, confirm in BUTTONS if action != config.missing_button
+            )
+            self._send(200, DASHBOARD_PAGE.format(
+                buttons=buttons, token=token, visible=json.dumps(VISIBLE_BUTTONS),
+                overlay_ms=config.overlay_ms, render_ms=config.render_ms,
+                stuck_overlay="true" if config.stuck_overlay else "false", state=json.dumps(current)))
+
+        def do_POST(self):
+            self._delay()
+            path = urlparse(self.path).path
+            if path == "/__state":
+                payload = json.loads(self._body() or "{}")
+                with state.lock:
+                    if payload.get("reset"):
+                        state.workday.clear()
+                        state.punches.clear()
+                    for email, value in payload.get("workday", {}).items():
+                        state.workday[email] = value
+                return self._json(200, {"ok": True})
+
+            if path == "/Account/Login":
+                form = {k: v[0] for k, v in parse_qs(self._body(), keep_blank_values=True).items()}
+                with state.lock:
+                    valid_token = form.get("__RequestVerificationToken") in state.tokens
+                if config.fail_login or not valid_token or not form.get("Username") or not form.get("Password"):
+                    return self._send(200 if not config.fail_login else 500, LOGIN_PAGE.format(
+                        token="", error='<p class="error">Usuario o contraseña incorrectos</p>', cookie_banner=""))
+                sid = secrets.token_urlsafe(24)
+                with state.lock:
+                    state.sessions[sid] = (form["Username"], time.time(), secrets.token_urlsafe(16))
+                return self._send(302, "", headers={"Location": "/", "Set-Cookie": f"BixpeSession={sid}; Path=/; HttpOnly"})
+
+            if path.startswith("/api/workday/"):
+                action = path.rsplit("/", 1)[-1]
+                session = self._session()
+                if not session or action not in TRANSITIONS:
+                    return self._json(401 if not session else 404, {"success": False})
+                email, _, token = session
+                self._body()
+                if self.headers.get("RequestVerificationToken") != token:
+                    return self._json(400, {"success": False, "error": "Invalid anti-forgery token"})
+                if config.fail_rate and random.random() < config.fail_rate:
+                    return self._json(500, {"success": False, "error": "Injected failure"})
+                allowed_from, target = TRANSITIONS[action]
+                with state.lock:
+                    current = state.workday.setdefault(email, "NOT_STARTED")
+                    if current not in allowed_from:
+                        return self._json(409, {"success": False, "state": current})
+                    state.workday[email] = target
+                    state.punches.append((time.time(), email, action, target))
+                return self._json(200, {"success": True, "state": target})
+
+            self._send(404, "Not found")
+
+    return MockBixpeHandler
+
+
+def start_server(config=None, host="127.0.0.1", port=0):
+    """Starts the mock in a background thread. Returns (server, base_url, state)."""
+    state = MockState()
+    server = ThreadingHTTPServer((host, port), make_handler(config or MockConfig(), state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/", state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Bixpe stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Added to every response")
+    parser.add_argument("--overlay-ms", type=int, default=600, help="How long #processing-text covers the dashboard")
+    parser.add_argument("--render-ms", type=int, default=300, help="Delay before the dashboard renders its buttons")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Probability of a 500 on clock actions")
+    parser.add_argument("--fail-login", action="store_true", help="Every login attempt fails")
+    parser.add_argument("--missing-button", choices=["start", "pause", "resume", "stop"], help="Never render this button")
+    parser.add_argument("--stuck-overlay", action="store_true", help="#processing-text never disappears")
+    parser.add_argument("--session-ttl", type=int, default=None, help="Expire sessions after N seconds")
+    args = parser.parse_args()
+
+    cfg = MockConfig(args.latency_ms, args.overlay_ms, args.render_ms, args.fail_rate, args.fail_login,
+                     args.missing_button, args.stuck_overlay, args.session_ttl)
+    srv, url, _ = start_server(cfg, args.host, args.port)
+    print(f"Mock Bixpe listening on {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
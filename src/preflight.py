@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import calendar_plan
+import punch_journal
+
+# Stdlib-only layer: decides whether a punch is due before anything heavy (Playwright,
+# python-dotenv, Chromium) is imported or installed.
+
+
+def today_in(schedule_config):
+    """Current date in schedule.json's timezone (CI runners are on UTC)."""
+    return datetime.now(ZoneInfo(schedule_config.get("timezone", calendar_plan.DEFAULT_TIMEZONE))).date()
+
+
+def evaluate(action, schedule_config, holidays, overrides, force=False, today=None, email=None):
+    """Returns {"run": bool, "reason": str, "action", "day", "scheduled"} for this trigger.
+
+    Weekends, holidays and days marked "off" always skip (even with force); force only
+    skips the check that the action is scheduled for today. With email, the punch journal
+    also skips actions already recorded today and transitions its state machine rejects.
+    """
+    today = today or today_in(schedule_config)
+    decision = {"run": False, "reason": "", "action": action, "day": today.isoformat(), "scheduled": None}
+    if today.weekday() >= 5:
+        decision["reason"] = f"Today is weekend ({today.strftime('%A')})."
+        return decision
+    if today.strftime("%Y-%m-%d") in holidays:
+        decision["reason"] = f"Today is a holiday ({today})."
+        return decision
+    times = calendar_plan.day_times(schedule_config, holidays, overrides, today)
+    if times is None:
+        decision["reason"] = f"{today} is marked off in schedule_overrides.json."
+        return decision
+    decision["scheduled"] = times.get(action)
+    if decision["scheduled"] is None and not force:
+        decision["reason"] = f"Action {action} is not scheduled for today ({calendar_plan.day_schedule_key(today)})."
+        return decision
+    if email:
+        verdict, state = punch_journal.check(email, action, today)
+        if verdict == "already_done":
+            decision["reason"] = f"{action} is already in the punch journal for {today} (use --recheck to ask Bixpe)."
+            return decision
+        if verdict == "invalid":
+            decision["reason"] = (f"Punch journal says the workday is {state}; {action} is not possible "
+                                  f"(use --recheck to ask Bixpe).")
+            return decision
+    decision["run"] = True
+    decision["reason"] = f"{action} due today" + (f" at {decision['scheduled']}" if decision["scheduled"] else " (forced)")
+    return decision
+
+
+def credentials_present():
+    return bool(os.environ.get("BIXPE_EMAIL") and os.environ.get("BIXPE_PASSWORD"))
+
+
+def write_github_output(decision):
+    """Exposes the decision to later workflow steps (steps.<id>.outputs.should_run)."""
+    path = os.environ.get("GITHUB_OUTPUT")
+    if not path:
+        return
+    with open(path, "a") as f:
+        f.write(f"should_run={'true' if decision['run'] else 'false'}\n")
+        f.write(f"action={decision['action'] or ''}\n")
+
+
+def report(decision, import_seconds, started):
+    """--check-only output: the decision plus what the cheap path cost."""
+    heavy = [name for name in ("playwright.sync_api", "dotenv") if name in sys.modules]
+    print(f"[Preflight] {'RUN' if decision['run'] else 'SKIP'}: {decision['reason']}")
+    print(f"[Preflight] day={decision['day']} action={decision['action']} scheduled={decision['scheduled'] or '-'} "
+          f"credentials={'present' if credentials_present() else 'missing'}")
+    print(f"[Preflight] imports {import_seconds * 1000:.0f} ms, decision {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"heavy modules loaded: {', '.join(heavy) or 'none'}")
+    write_github_output(decision)
+
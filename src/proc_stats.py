@@ -0,0 +1,58 @@
+import os
+
+# Process names used by Playwright's Chromium builds (full browser and headless shell)
+CHROMIUM_PROCESS_MARKERS = ("chrome", "chromium", "headless_shell")
+
+
+def _process_table():
+    """Returns {pid: (ppid, name)} from /proc. Empty on platforms without procfs."""
+    table = {}
+    try:
+        pids = [int(entry) for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return table
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue  # Process exited while scanning
+        # Format: pid (comm) state ppid ... ; comm may contain spaces/parentheses
+        name = stat[stat.index("(") + 1:stat.rindex(")")]
+        ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+        table[pid] = (ppid, name)
+    return table
+
+
+def descendant_pids(root_pid=None):
+    """All live descendants of root_pid (defaults to this process)."""
+    root_pid = root_pid or os.getpid()
+    table = _process_table()
+    children = {}
+    for pid, (ppid, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    found, stack = [], [root_pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return [(pid, table[pid][1]) for pid in found]
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def chromium_tree_rss(root_pid=None):
+    """Resident memory (bytes) of every Chromium process started below root_pid."""
+    return sum(
+        _rss_bytes(pid) for pid, name in descendant_pids(root_pid)
+        if any(marker in name.lower() for marker in CHROMIUM_PROCESS_MARKERS)
+    )
@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, date, timedelta
+from zoneinfo import ZoneInfo
+
+import calendar_plan
+import session_cache
+
+# Append-only record of every confirmed punch. Lets duplicate/late triggers stop before a
+# browser starts, and answers "how many hours did I work" without asking Bixpe.
+JOURNAL_FILE = os.environ.get("BIXPE_JOURNAL_FILE", os.path.join(calendar_plan.REPO_DIR, "punch_journal.jsonl"))
+
+# Workday state machine: NOT_STARTED -> WORKING <-> PAUSED, WORKING -> ENDED
+# action -> (states it can be performed from, state it leads to)
+TRANSITIONS = {
+    "START": (("NOT_STARTED",), "WORKING"),
+    "PAUSE": (("WORKING",), "PAUSED"),
+    "RESUME": (("PAUSED",), "WORKING"),
+    "END": (("WORKING",), "ENDED"),
+}
+# Outcomes that mean the action is registered in Bixpe
+RECORDED_OUTCOMES = ("DONE", "ALREADY_DONE")
+
+# Which action buttons the dashboard offers -> workday state it is in
+DASHBOARD_STATE_JS = """(selectors) => {
+    const isShown = (el) => {
+        if (!el) return false;
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && window.getComputedStyle(el).visibility !== 'hidden';
+    };
+    return Object.keys(selectors).filter(action => selectors[action].some(sel => isShown(document.querySelector(sel))));
+}"""
+
+
+def state_from_buttons(offered):
+    """Workday state implied by the visible action buttons (None if it can't tell)."""
+    if "RESUME" in offered:
+        return "PAUSED"
+    if "PAUSE" in offered or "END" in offered:
+        return "WORKING"
+    if "START" in offered:
+        return "NOT_STARTED"
+    return None
+
+
+def already_done_plausible(action, dashboard_state, journal_state):
+    """Whether a hidden action button on a dashboard in dashboard_state means the action was done today.
+
+    READY_JS says "hidden" whenever another action button is shown: PAUSE is hidden before START too.
+    """
+    if action == "START":
+        return dashboard_state in ("WORKING", "PAUSED")
+    if action == "PAUSE":
+        return dashboard_state == "PAUSED"
+    if action == "RESUME":
+        # The dashboard is WORKING before the first pause as well: only a journaled PAUSE tells them apart
+        return dashboard_state == "WORKING" and journal_state == "PAUSED"
+    # After END Bixpe offers START again, as before the workday began
+    return dashboard_state == "NOT_STARTED" and journal_state != "NOT_STARTED"
+
+
+def _tz():
+    return ZoneInfo(calendar_plan._load_json(calendar_plan.SCHEDULE_FILE, {}).get(
+        "timezone", calendar_plan.DEFAULT_TIMEZONE))
+
+
+def today():
+    """Current journal day (schedule.json's timezone, not the runner's)."""
+    return datetime.now(_tz()).date()
+
+
+def load_entries(journal_file=None):
+    path = journal_file or JOURNAL_FILE
+    entries = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # A torn last line must not hide the rest of the journal
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def day_entries(email, day, journal_file=None):
+    key = session_cache.account_key(email)
+    return [e for e in load_entries(journal_file) if e["account"] == key and e["day"] == day.isoformat()]
+
+
+def replay(entries):
+    """State reached after the day's recorded actions (NOT_STARTED if none)."""
+    state = "NOT_STARTED"
+    for entry in entries:
+        state = TRANSITIONS[entry["action"]][1]
+    return state
+
+
+def check(email, action, day, journal_file=None):
+    """Returns (verdict, state): "unknown" (nothing recorded today), "ok", "already_done" or "invalid"."""
+    entries = day_entries(email, day, journal_file)
+    if not entries:
+        return "unknown", "NOT_STARTED"
+    state = replay(entries)
+    if any(e["action"] == action for e in entries):
+        return "already_done", state
+    if state not in TRANSITIONS[action][0]:
+        return "invalid", state
+    return "ok", state
+
+
+def record(email, action, outcome, dashboard_state=None, latency_seconds=None, mode="browser", journal_file=None):
+    """Appends one confirmed action. Simulated/failed outcomes are ignored; callers skip simulations.
+
+    ALREADY_DONE is only kept when dashboard_state is one the action could have led to.
+    """
+    if outcome not in RECORDED_OUTCOMES:
+        return None
+    now = datetime.now(_tz())
+    entries = day_entries(email, now.date(), journal_file)
+    journal_state = replay(entries)
+    if any(e["action"] == action for e in entries):
+        return None  # Already in the journal (e.g. a recheck that found the button hidden)
+    if outcome == "ALREADY_DONE" and not already_done_plausible(action, dashboard_state, journal_state):
+        print(f"[Journal] Not recording {action}: its button is hidden but the dashboard is "
+              f"{dashboard_state or 'unknown'}, which {action} can't have led to.")
+        return None
+    entry = {
+        "ts": now.isoformat(timespec="seconds"),
+        "day": now.date().isoformat(),
+        "account": session_cache.account_key(email),
+        "action": action,
+        "outcome": outcome,
+        "dashboard_state": dashboard_state,
+        "journal_state": journal_state,
+        "latency_seconds": round(latency_seconds, 3) if latency_seconds is not None else None,
+        "mode": mode,
+    }
+    if journal_state not in TRANSITIONS[action][0]:
+        print(f"[Journal] Warning: {action} recorded from journal state {journal_state}.")
+    path = journal_file or JOURNAL_FILE
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Warning: could not write punch journal {path}: {e}")
+    return entry
+
+
+def worked_seconds(entries, until=None):
+    """Seconds spent WORKING from a day's entries; an open interval counts up to `until` if given."""
+    total, since = 0.0, None
+    for entry in entries:
+        ts = datetime.fromisoformat(entry["ts"])
+        if entry["action"] in ("START", "RESUME"):
+            since = ts
+        elif since is not None:
+            total += (ts - since).total_seconds()
+            since = None
+    if since is not None and until is not None:
+        total += max(0.0, (until - since).total_seconds())
+    return total
+
+
+def hours_by_day(email, start, end, journal_file=None):
+    """{date: hours} for start..end (inclusive), from the journal."""
+    key = session_cache.account_key(email)
+    now = datetime.now(_tz())
+    by_day = {}
+    for entry in load_entries(journal_file):
+        if entry["account"] == key and start.isoformat() <= entry["day"] <= end.isoformat():
+            by_day.setdefault(entry["day"], []).append(entry)
+    return {date.fromisoformat(day): worked_seconds(entries, now if day == now.date().isoformat() else None) / 3600
+            for day, entries in sorted(by_day.items())}
+
+
+def format_hours(hours):
+    minutes = round(hours * 60)
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Punch journal queries")
+    parser.add_argument("--email", default=os.environ.get("BIXPE_EMAIL"), help="Account (default: BIXPE_EMAIL)")
+    parser.add_argument("--hours", choices=["day", "week"], default="day", help="Hours worked for the day or ISO week")
+    parser.add_argument("--date", help="Day inside the period (YYYY-MM-DD). Default: today")
+    parser.add_argument("--show", action="store_true", help="Print the journal entries of the period")
+    args = parser.parse_args()
+    if not args.email:
+        parser.error("--email or BIXPE_EMAIL is required")
+
+    day = date.fromisoformat(args.date) if args.date else today()
+    start = day - timedelta(days=day.weekday()) if args.hours == "week" else day
+    end = start + timedelta(days=6) if args.hours == "week" else day
+    hours = hours_by_day(args.email, start, end)
+
+    if args.show:
+        key = session_cache.account_key(args.email)
+        for e in load_entries():
+            if e["account"] == key and start.isoformat() <= e["day"] <= end.isoformat():
+                print(f"{e['ts']}  {e['action']:<6} {e['outcome']:<12} dashboard={e['dashboard_state'] or '-'}  "
+                      f"latency={e['latency_seconds'] if e['latency_seconds'] is not None else '-'}s  {e['mode']}")
+    for d, h in hours.items():
+        print(f"{d} ({d:%a})  {format_hours(h)}")
+    print(f"Total {start} .. {end}: {format_hours(sum(hours.values()))}")
+    sys.exit(0)
@@ -0,0 +1,157 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# Paths of the XHR endpoints Bixpe calls when a clock action is registered (matched against
+# the URL path only: the host itself is worktime.bixpe.com). Override with
+# BIXPE_CLOCK_URL_PATTERN if the backend routes change.
+CLOCK_URL_PATTERN = re.compile(
+    os.environ.get("BIXPE_CLOCK_URL_PATTERN", r"(?i)(workday|clock|fichaj|punch|pause|resume)")
+)
+
+# Resolves to "ready" when the target button can be clicked, to "hidden" when the
+# dashboard has settled but the target is not offered (action already done), and
+# to null while Bixpe is still rendering or the #processing-text overlay is up.
+READY_JS = """([target, allSelectors]) => {
+    const isShown = (el) => {
+        if (!el) return false;
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    if (isShown(document.querySelector('#processing-text'))) return null;
+
+    const el = document.querySelector(target);
+    if (isShown(el)) {
+        const rect = el.getBoundingClientRect();
+        const topEl = document.elementFromPoint(rect.left + rect.width / 2, rect.top + rect.height / 2);
+        return (topEl && (topEl === el || el.contains(topEl))) ? 'ready' : null;
+    }
+    if (el && allSelectors.some(sel => isShown(document.querySelector(sel)))) return 'hidden';
+    return null;
+}"""
+
+SHOWN_JS = """(selector) => {
+    const el = document.querySelector(selector);
+    if (!el) return false;
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0 && window.getComputedStyle(el).visibility !== 'hidden';
+}"""
+
+
+class WaitLog:
+    """Records how long every wait of a run actually took (plus free-form run attributes in extra)."""
+
+    def __init__(self):
+        self.waits = []
+        self.extra = {}
+
+    @contextmanager
+    def measure(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.waits.append((name, time.perf_counter() - started))
+
+    def add(self, name, seconds):
+        """Records a wait measured elsewhere (e.g. inside the page)."""
+        self.waits.append((name, seconds))
+
+    def report(self):
+        if not self.waits:
+            return
+        summary = " | ".join(f"{name}={seconds:.2f}s" for name, seconds in self.waits)
+        print(f"[Waits] {summary} | total={sum(s for _, s in self.waits):.2f}s")
+
+
+def wait_for_action_ready(page, selector, all_selectors, timeout=30000):
+    """Returns "ready" or "hidden" as soon as the dashboard settles for this button.
+
+    Raises the Playwright TimeoutError if neither state is reached in time.
+    """
+    handle = page.wait_for_function(READY_JS, arg=[selector, all_selectors], timeout=timeout, polling=100)
+    return handle.json_value()
+
+
+def is_clock_response(response, host):
+    """True for a non-GET XHR/fetch to the Bixpe host whose path looks like a clock action."""
+    request = response.request
+    url = urlparse(request.url)
+    return request.resource_type in ("xhr", "fetch") and request.method != "GET" \
+        and url.hostname == host and bool(CLOCK_URL_PATTERN.search(url.path))
+
+
+def request_started_at(response):
+    """Epoch seconds at which the response's request was sent (arrival time if Playwright has no timing)."""
+    try:
+        start = response.request.timing["startTime"]
+        if start and start > 0:
+            return start / 1000
+    except Exception:
+        pass
+    return time.time()
+
+
+class ClockWatcher:
+    """Collects Bixpe clock XHR responses fired after the click.
+
+    Attach before clicking, then call verify() once the click (and the modal
+    confirmation, if any) has been sent.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.responses = []
+        self.host = urlparse(page.url).hostname
+        self._handler = self._on_response
+        page.on("response", self._handler)
+
+    def _on_response(self, response):
+        if is_clock_response(response, self.host):
+            self.responses.append((request_started_at(response), response.url, response.status))
+
+    def detach(self):
+        try:
+            self.page.remove_listener("response", self._handler)
+        except Exception:
+            pass
+
+    def verify(self, selector, clicked_at=None, xhr_timeout=10000, dom_timeout=10000):
+        """Waits for the clock XHR and for the button to leave the DOM state.
+
+        Only requests sent at or after clicked_at (epoch seconds, the in-page click time)
+        count: background calls made while the agent waited for the overlay are ignored.
+        Each signal has its own deadline; returns as soon as either one confirms.
+        Returns a dict with the signal that confirmed the punch (or None) and its latency.
+        """
+        started = time.perf_counter()
+        xhr_deadline = started + xhr_timeout / 1000
+        dom_deadline = started + dom_timeout / 1000
+        result = {"confirmed_by": None, "xhr": None, "seconds": None}
+
+        after_click = lambda: [r for r in self.responses if clicked_at is None or r[0] >= clicked_at]
+        try:
+            while True:
+                now = time.perf_counter()
+                ok_responses = [r for r in after_click() if r[2] < 400]
+                if now <= xhr_deadline and ok_responses:
+                    result["confirmed_by"] = "xhr"
+                    result["xhr"] = {"url": ok_responses[0][1], "status": ok_responses[0][2]}
+                    break
+                if now <= dom_deadline and not self.page.evaluate(SHOWN_JS, selector):
+                    result["confirmed_by"] = "dom"
+                    break
+                if now > xhr_deadline and now > dom_deadline:
+                    break
+                self.page.wait_for_timeout(100)  # Keeps Playwright dispatching response events
+        finally:
+            self.detach()
+
+        result["seconds"] = time.perf_counter() - started
+        if after_click() and not result["xhr"]:
+            first = after_click()[0]
+            result["xhr"] = {"url": first[1], "status": first[2]}
+        return result
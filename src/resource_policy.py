@@ -0,0 +1,142 @@
+import os
+import json
+from fnmatch import fnmatch
+
+POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resource_policy.json")
+DEFAULT_PRESET = "safe"
+# Modes that hold a page open across time.sleep() (daemon, arm, sequence). A catch-all route
+# disables Chromium's HTTP cache and, with the sync API, parks every request until the next
+# Playwright call, so these modes only filter when a preset is asked for explicitly.
+WARM_DEFAULT_PRESET = "off"
+
+# Typical transfer sizes, used to estimate the bytes a blocked request would have cost
+# when no request of that type was allowed (and measured) in the same run.
+NOMINAL_SIZES = {
+    "image": 25 * 1024,
+    "font": 40 * 1024,
+    "media": 250 * 1024,
+    "stylesheet": 30 * 1024,
+    "script": 60 * 1024,
+}
+NOMINAL_SIZE_OTHER = 5 * 1024
+
+
+class ResourcePolicy:
+    """Allow/deny rules applied to every request of a context via context.route.
+
+    allow_patterns always win; then a request is blocked if its resource type is in
+    block_types or its URL matches one of block_patterns (fnmatch globs).
+    """
+
+    def __init__(self, name, block_types=(), block_patterns=(), allow_patterns=()):
+        self.name = name
+        self.block_types = set(block_types)
+        self.block_patterns = list(block_patterns)
+        self.allow_patterns = list(allow_patterns)
+        self.stats = {"allowed": {}, "blocked": {}, "bytes_allowed": {}}
+
+    @property
+    def enabled(self):
+        return bool(self.block_types or self.block_patterns)
+
+    def should_block(self, url, resource_type):
+        if any(fnmatch(url, pattern) for pattern in self.allow_patterns):
+            return False
+        if resource_type in self.block_types:
+            return True
+        return any(fnmatch(url, pattern) for pattern in self.block_patterns)
+
+    def _count(self, bucket, resource_type):
+        self.stats[bucket][resource_type] = self.stats[bucket].get(resource_type, 0) + 1
+
+    def _on_response(self, response):
+        try:
+            size = int(response.headers.get("content-length", 0))
+        except ValueError:
+            size = 0
+        rtype = response.request.resource_type
+        self.stats["bytes_allowed"][rtype] = self.stats["bytes_allowed"].get(rtype, 0) + size
+
+    def _handle(self, route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self._count("blocked", request.resource_type)
+            route.abort("blockedbyclient")
+        else:
+            self._count("allowed", request.resource_type)
+            route.continue_()
+
+    async def _handle_async(self, route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self._count("blocked", request.resource_type)
+            await route.abort("blockedbyclient")
+        else:
+            self._count("allowed", request.resource_type)
+            await route.continue_()
+
+    def install(self, context):
+        """Routes every request of a sync API context through the policy."""
+        if not self.enabled:
+            return
+        context.route("**/*", self._handle)
+        context.on("response", self._on_response)
+        print(f"Resource policy '{self.name}' active.")
+
+    async def install_async(self, context):
+        """Same as install() for async API contexts (batch mode)."""
+        if not self.enabled:
+            return
+        await context.route("**/*", self._handle_async)
+        context.on("response", self._on_response)
+
+    def estimated_bytes_saved(self):
+        saved = 0
+        for rtype, blocked in self.stats["blocked"].items():
+            allowed = self.stats["allowed"].get(rtype, 0)
+            measured = self.stats["bytes_allowed"].get(rtype, 0)
+            average = measured / allowed if allowed and measured else NOMINAL_SIZES.get(rtype, NOMINAL_SIZE_OTHER)
+            saved += blocked * average
+        return int(saved)
+
+    def summary(self):
+        return {
+            "preset": self.name,
+            "allowed": sum(self.stats["allowed"].values()),
+            "blocked": sum(self.stats["blocked"].values()),
+            "bytes_allowed": sum(self.stats["bytes_allowed"].values()),
+            "bytes_saved_estimate": self.estimated_bytes_saved(),
+            "blocked_by_type": dict(self.stats["blocked"]),
+        }
+
+    def report(self):
+        if not self.enabled:
+            return
+        s = self.summary()
+        by_type = ", ".join(f"{k}={v}" for k, v in sorted(s["blocked_by_type"].items())) or "none"
+        print(f"[Resources] policy={s['preset']} | allowed {s['allowed']} ({s['bytes_allowed'] / 1024:.0f} KB) | "
+              f"blocked {s['blocked']} (~{s['bytes_saved_estimate'] / 1024:.0f} KB saved) | blocked by type: {by_type}")
+
+
+def load_policy(preset=None, json_path=POLICY_FILE, warm=False):
+    """Builds the policy for preset (or the file's "preset"). Missing file -> no blocking.
+
+    warm: the caller keeps the page idle between Playwright calls; without an explicit
+    preset it gets WARM_DEFAULT_PRESET instead of the file's preset.
+    """
+    if warm and not preset:
+        preset = WARM_DEFAULT_PRESET
+    try:
+        with open(json_path, "r") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        print(f"Warning: {json_path} not found. Resource blocking disabled.")
+        return ResourcePolicy("off")
+
+    name = preset or config.get("preset", DEFAULT_PRESET)
+    rules = config.get("presets", {}).get(name)
+    if rules is None:
+        print(f"Warning: resource policy preset '{name}' not defined. Resource blocking disabled.")
+        return ResourcePolicy("off")
+    return ResourcePolicy(name, rules.get("block_types", []), rules.get("block_patterns", []),
+                          rules.get("allow_patterns", []))
@@ -0,0 +1,129 @@
+import os
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Failure classes. Each one has its own backoff and its own way back to a usable page.
+TRANSIENT_NETWORK = "transient_network"  # net::ERR_*, navigation timeouts, 5xx pages
+OVERLAY_STUCK = "overlay_stuck"          # #processing-text never cleared
+SELECTOR_MISS = "selector_miss"          # Login field or action button not found
+SESSION_EXPIRED = "session_expired"      # Bixpe is showing the login form again
+UNCONFIRMED = "unconfirmed"              # Clicked, but neither the XHR nor the DOM confirmed it
+BROWSER_CRASHED = "browser_crashed"      # Page/context/browser closed under us
+UNKNOWN = "unknown"
+
+# class -> (first delay in seconds, multiplier, max attempts including the first one)
+BACKOFF = {
+    TRANSIENT_NETWORK: (2, 2.0, 4),
+    OVERLAY_STUCK: (3, 1.5, 3),
+    SELECTOR_MISS: (5, 2.0, 2),
+    SESSION_EXPIRED: (0, 1.0, 2),
+    UNCONFIRMED: (3, 1.0, 2),
+    BROWSER_CRASHED: (1, 2.0, 2),
+    UNKNOWN: (5, 2.0, 2),
+}
+
+# Stop retrying this long after the scheduled time (or after the start of a forced run)
+DEADLINE_MINUTES = float(os.environ.get("BIXPE_RETRY_DEADLINE_MINUTES", "15"))
+
+LOGIN_FORM_SELECTOR = "#emailLogin, #passwordLogin"
+NETWORK_MARKERS = ("net::ERR_", "ERR_CONNECTION", "ERR_NAME_NOT_RESOLVED", "ECONNRESET", "502", "503", "504")
+CRASH_MARKERS = ("has been closed", "Target closed", "Browser closed", "Connection closed", "crashed")
+
+
+def deadline_for(scheduled, timezone_name, minutes=DEADLINE_MINUTES, now=None):
+    """Absolute time.time() deadline: scheduled "HH:MM" today (in timezone_name) + minutes.
+
+    Without a scheduled time (forced runs) the budget starts now.
+    """
+    tz = ZoneInfo(timezone_name)
+    now = now or datetime.now(tz)
+    start = now
+    if scheduled:
+        hour, minute = (int(part) for part in scheduled.split(":"))
+        start = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    # A late trigger still gets one full attempt even if the budget is already spent
+    return max(start + timedelta(minutes=minutes), now).timestamp()
+
+
+def classify(error, page=None):
+    """Maps an exception (plus a look at the page, if still usable) to a failure class."""
+    kind = getattr(error, "kind", None)
+    message = str(error)
+    if any(marker in message for marker in CRASH_MARKERS):
+        return BROWSER_CRASHED
+    if page is not None:
+        try:
+            if page.is_visible(LOGIN_FORM_SELECTOR):
+                return SESSION_EXPIRED
+        except Exception:
+            return BROWSER_CRASHED
+    if kind in BACKOFF:
+        return kind
+    if any(marker in message for marker in NETWORK_MARKERS) or type(error).__name__ == "TimeoutError":
+        return TRANSIENT_NETWORK
+    if "not found" in message:
+        return SELECTOR_MISS
+    return UNKNOWN
+
+
+class RetryEngine:
+    """Runs a phase until it succeeds, its class runs out of attempts or the deadline passes.
+
+    Every attempt (ok or failed) is printed and kept in metrics.extra["attempts"].
+    """
+
+    def __init__(self, deadline, metrics):
+        self.deadline = deadline
+        self.metrics = metrics
+        self.attempts = metrics.extra.setdefault("attempts", [])
+
+    def _delay(self, kind, failures_of_kind):
+        first, multiplier, _ = BACKOFF[kind]
+        return first * multiplier ** (failures_of_kind - 1)
+
+    def run(self, phase, operation, recover, get_page=None):
+        """Returns operation()'s result. recover(kind) must leave a page ready for the next try.
+
+        Re-raises the last error when giving up.
+        """
+        failures = {}
+        while True:
+            number = len([a for a in self.attempts if a["phase"] == phase]) + 1
+            started = time.perf_counter()
+            try:
+                result = operation()
+            except Exception as e:
+                seconds = time.perf_counter() - started
+                kind = classify(e, get_page() if get_page else None)
+                failures[kind] = failures.get(kind, 0) + 1
+                self.attempts.append({"phase": phase, "attempt": number, "ok": False, "class": kind,
+                                      "seconds": round(seconds, 3), "error": str(e).splitlines()[0][:200]})
+                delay = self._delay(kind, failures[kind])
+                remaining = self.deadline - time.time()
+                print(f"[Retry] {phase} attempt {number} failed after {seconds:.1f}s ({kind}): {str(e).splitlines()[0]}")
+                if failures[kind] >= BACKOFF[kind][2]:
+                    print(f"[Retry] Giving up on {phase}: {kind} failed {failures[kind]} times.")
+                    raise
+                if remaining <= delay:
+                    print(f"[Retry] Giving up on {phase}: deadline reached ({max(0, remaining):.0f}s left).")
+                    raise
+                if delay:
+                    print(f"[Retry] Waiting {delay:.1f}s before retrying ({remaining:.0f}s left before the deadline).")
+                    time.sleep(delay)
+                try:
+                    with self.metrics.measure(f"recover:{kind}"):
+                        recover(kind)
+                except Exception as recover_error:
+                    if kind == BROWSER_CRASHED:
+                        raise
+                    print(f"[Retry] Recovery for {kind} failed ({recover_error}); relaunching the browser.")
+                    with self.metrics.measure(f"recover:{BROWSER_CRASHED}"):
+                        recover(BROWSER_CRASHED)
+                continue
+            seconds = time.perf_counter() - started
+            self.attempts.append({"phase": phase, "attempt": number, "ok": True, "class": None,
+                                  "seconds": round(seconds, 3), "error": None})
+            if number > 1:
+                print(f"[Retry] {phase} succeeded on attempt {number} ({seconds:.1f}s).")
+            return result
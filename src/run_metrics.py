@@ -0,0 +1,167 @@
+import os
+import sys
+import re
+import json
+import time
+import threading
+
+import readiness
+import proc_stats
+
+# One JSON line per run; collect these over weeks to track time-to-punch percentiles
+METRICS_FILE = os.environ.get("BIXPE_METRICS_FILE", "bixpe_metrics.jsonl")
+# Optional node_exporter textfile collector directory (one .prom file per action)
+PROM_TEXTFILE_DIR = os.environ.get("BIXPE_PROM_TEXTFILE_DIR")
+
+RSS_SAMPLE_SECONDS = 0.25
+
+
+class RssSampler(threading.Thread):
+    """Samples the Chromium process tree RSS in the background and keeps the peak."""
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, proc_stats.chromium_tree_rss())
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        return self.peak
+
+
+class RunMetrics(readiness.WaitLog):
+    """Named phase spans of one run plus the machine-readable record written at the end.
+
+    Drop-in for readiness.WaitLog: every measure() call becomes a span.
+    """
+
+    def __init__(self, action, mode="browser", sample_rss=True):
+        super().__init__()
+        self.action = action
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.sampler = RssSampler()
+        if sample_rss:
+            self.sampler.start()
+        self.recorded = None
+
+    def span(self, name):
+        return self.measure(name)
+
+    def spans(self):
+        """{name: seconds}; repeated names (retries, multiple probes) get a #n suffix."""
+        result = {}
+        for name, seconds in self.waits:
+            key, n = name, 1
+            while key in result:
+                n += 1
+                key = f"{name}#{n}"
+            result[key] = round(seconds, 4)
+        return result
+
+    def report(self):
+        if self.waits:
+            summary = " | ".join(f"{name}={seconds:.2f}s" for name, seconds in self.waits)
+            print(f"[Spans] {summary}")
+
+    def record(self, outcome, metrics_file=None, prom_dir=None):
+        """Writes the JSON-lines record (and Prometheus textfile). Only the first call counts.
+
+        Defaults are read from the module at call time so tools (benchmark.py) can redirect them.
+        """
+        if self.recorded:
+            return self.recorded
+        metrics_file = metrics_file if metrics_file is not None else METRICS_FILE
+        prom_dir = prom_dir if prom_dir is not None else PROM_TEXTFILE_DIR
+        peak_rss = self.sampler.stop()
+        self.recorded = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "action": self.action,
+            "mode": self.mode,
+            "outcome": outcome,
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "spans": self.spans(),
+            "chromium_peak_rss_bytes": peak_rss,
+        }
+        self.recorded.update(self.extra)
+        self.report()
+        print(f"[Metrics] {self.action} {outcome} in {self.recorded['total_seconds']:.2f}s, "
+              f"Chromium peak RSS {peak_rss / (1024 * 1024):.0f} MB")
+        if metrics_file:
+            try:
+                with open(metrics_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(self.recorded) + "\n")
+            except OSError as e:
+                print(f"Warning: could not write metrics to {metrics_file}: {e}")
+        if prom_dir:
+            write_prometheus_textfile(self.recorded, prom_dir)
+        return self.recorded
+
+
+def write_prometheus_textfile(record, prom_dir):
+    labels = f'action="{record["action"]}",mode="{record["mode"]}"'
+    lines = [
+        "# HELP bixpe_run_duration_seconds Wall-clock duration of the last run.",
+        "# TYPE bixpe_run_duration_seconds gauge",
+        f'bixpe_run_duration_seconds{{{labels},outcome="{record["outcome"]}"}} {record["total_seconds"]}',
+        "# HELP bixpe_run_success Whether the last run punched (or found the action already done).",
+        "# TYPE bixpe_run_success gauge",
+        f'bixpe_run_success{{{labels}}} {1 if record["outcome"] in ("DONE", "SIMULATED", "ALREADY_DONE") else 0}',
+        "# HELP bixpe_phase_duration_seconds Duration of each phase of the last run.",
+        "# TYPE bixpe_phase_duration_seconds gauge",
+    ]
+    lines += [f'bixpe_phase_duration_seconds{{{labels},phase="{name}"}} {seconds}'
+              for name, seconds in record["spans"].items()]
+    lines += [
+        "# HELP bixpe_chromium_peak_rss_bytes Peak RSS of the Chromium process tree during the last run.",
+        "# TYPE bixpe_chromium_peak_rss_bytes gauge",
+        f'bixpe_chromium_peak_rss_bytes{{{labels}}} {record["chromium_peak_rss_bytes"]}',
+        "# HELP bixpe_last_run_timestamp_seconds Unix time of the last run.",
+        "# TYPE bixpe_last_run_timestamp_seconds gauge",
+        f'bixpe_last_run_timestamp_seconds{{{labels}}} {int(time.time())}',
+    ]
+    os.makedirs(prom_dir, exist_ok=True)
+    path = os.path.join(prom_dir, f"bixpe_bot_{record['action'].lower()}.prom")
+    with open(path + ".tmp", "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(path + ".tmp", path)  # node_exporter must never read a partial file
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(metrics_file=METRICS_FILE):
+    """Prints p50/p95 of total time and of each phase, per action."""
+    by_action = {}
+    with open(metrics_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                by_action.setdefault(record["action"], []).append(record)
+
+    for action, records in sorted(by_action.items()):
+        totals = [r["total_seconds"] for r in records]
+        failures = sum(1 for r in records if r["outcome"] not in ("DONE", "SIMULATED", "ALREADY_DONE"))
+        print(f"{action}: {len(records)} runs, {failures} failed | total p50={percentile(totals, 50):.2f}s "
+              f"p95={percentile(totals, 95):.2f}s")
+        phases = {}
+        for r in records:
+            for name, seconds in r["spans"].items():
+                phases.setdefault(re.sub(r"#\d+$", "", name), []).append(seconds)
+        for name, values in phases.items():
+            print(f"    {name:<28} p50={percentile(values, 50):.2f}s p95={percentile(values, 95):.2f}s")
+
+
+if __name__ == "__main__":
+    summarize(sys.argv[1] if len(sys.argv) > 1 else METRICS_FILE)
@@ -0,0 +1,223 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from playwright.sync_api import sync_playwright
+
+import bixpe_bot
+import calendar_plan
+import artifacts
+import event_log
+import proc_stats
+import punch_journal
+import resource_policy
+import retry_policy
+import run_metrics
+
+ACTION_ORDER = calendar_plan.ACTION_ORDER
+
+# Refresh + health-check the warm page this long before a punch is due
+PREPARE_SECONDS = 30
+# How often the idle daemon checks that Chromium is still alive and within memory budget
+HEALTH_INTERVAL_SECONDS = 300
+# Restart Chromium when its process tree grows beyond this (leaky long-lived dashboards)
+MAX_RSS_MB = float(os.environ.get("BIXPE_DAEMON_MAX_RSS_MB", "800"))
+# Still fire an action if the daemon (re)started up to this late
+CATCH_UP_SECONDS = 120
+
+
+def next_due_action(schedule_config, holidays, now, fired, horizon_days=31, overrides=None):
+    """Returns (due_datetime, action) for the next scheduled punch not yet fired.
+
+    Weekends, holidays.json dates and schedule_overrides.json are applied by calendar_plan;
+    times are interpreted in now.tzinfo.
+    """
+    threshold = now - timedelta(seconds=CATCH_UP_SECONDS)
+    plan = calendar_plan.compile_plan(schedule_config, holidays, overrides or {}, threshold.date(),
+                                      now.date() + timedelta(days=horizon_days))
+    for due, action in plan.events_from(threshold):
+        if (due.date(), action) not in fired:
+            return due, action
+    return None, None
+
+
+class WarmBrowser:
+    """A bixpe_bot.BixpeSession kept alive between punches, plus health and memory checks."""
+
+    def __init__(self, email, password, headless=True, use_session_cache=True, resource_preset=None):
+        self.email = email
+        self.password = password
+        self.headless = headless
+        self.use_session_cache = use_session_cache
+        self.policy = resource_policy.load_policy(resource_preset, warm=True)
+        self.p = None
+        self.session = None
+
+    @property
+    def page(self):
+        return self.session.page if self.session else None
+
+    def _login(self):
+        if not self.session.page:
+            self.session.open_browser()
+        self.session.auth()
+
+    def start(self):
+        """Launches and logs in, retried per failure class (retry_policy). Raises when it gives up."""
+        started = time.perf_counter()
+        setup = run_metrics.RunMetrics("DAEMON", mode="daemon")
+        self.p = sync_playwright().start()
+        self.session = bixpe_bot.BixpeSession(self.p, self.email, self.password, setup, headless=self.headless,
+                                              use_session_cache=self.use_session_cache, policy=self.policy)
+        engine = retry_policy.RetryEngine(time.time() + retry_policy.DEADLINE_MINUTES * 60, setup)
+        try:
+            engine.run("login", self._login, self.session.recover, get_page=lambda: self.page)
+        except Exception:
+            setup.record("LOGIN_FAILED")
+            raise
+        setup.record("READY")
+        print(f"[Daemon] Warm browser ready in {time.perf_counter() - started:.1f}s.")
+
+    def stop(self, trace_name=None):
+        if self.session:
+            self.session.close(trace_name=trace_name)
+        try:
+            if self.p:
+                self.p.stop()
+        except Exception:
+            pass
+        self.p = self.session = None
+
+    def restart(self, reason, trace_name=None):
+        print(f"[Daemon] Restarting browser: {reason}")
+        self.stop(trace_name=trace_name)
+        try:
+            self.start()
+        except Exception as e:
+            # Leave it stopped: the next health check sees "browser disconnected" and retries
+            print(f"[Daemon] Browser restart failed: {e}")
+            self.stop()
+
+    def rotate_trace(self, trace_name=None):
+        """Ends the trace of the last punch (saved as trace_name on failure) and starts the next one."""
+        session = self.session
+        if session and session.tracing and session.context:
+            artifacts.stop_trace(session.context, trace_name)
+            session.tracing = artifacts.start_trace(session.context)
+
+    def health_check(self):
+        """Returns (ok, detail)."""
+        browser = self.session.browser if self.session else None
+        if not browser or not browser.is_connected():
+            return False, "browser disconnected"
+        try:
+            self.page.evaluate("1")
+        except Exception as e:
+            return False, f"page unresponsive ({e})"
+        rss_mb = proc_stats.chromium_tree_rss() / (1024 * 1024)
+        if rss_mb > MAX_RSS_MB:
+            return False, f"Chromium RSS {rss_mb:.0f} MB > {MAX_RSS_MB:.0f} MB"
+        return True, f"Chromium RSS {rss_mb:.0f} MB"
+
+    def ensure_healthy(self):
+        ok, detail = self.health_check()
+        if ok:
+            print(f"[Daemon] Health OK ({detail}).")
+        else:
+            self.restart(detail)
+
+
+def run_daemon(email, password, schedule_file, holidays_file, headless=True, dry_run=False,
+               use_session_cache=True, resource_preset=None):
+    """Sleeps until each schedule.json action is due and fires it from the warm page.
+
+    schedule.json, holidays.json and schedule_overrides.json are re-read every cycle, so edits apply without a restart.
+    """
+    warm = WarmBrowser(email, password, headless=headless, use_session_cache=use_session_cache,
+                       resource_preset=resource_preset)
+    fired = set()
+    announced = None
+
+    try:
+        try:
+            warm.start()
+        except Exception as e:
+            print(f"[Daemon] Could not start the warm browser: {e}")
+            sys.exit(1)
+        last_health = time.monotonic()
+        while True:
+            schedule_config = bixpe_bot.load_schedule(schedule_file)
+            holidays = bixpe_bot.load_holidays(holidays_file)
+            overrides = calendar_plan.load_overrides()
+            tz = ZoneInfo(schedule_config.get("timezone", "Europe/Madrid"))
+            now = datetime.now(tz)
+            fired = {(day, action) for day, action in fired if day >= now.date()}
+
+            due, action = next_due_action(schedule_config, holidays, now, fired, overrides=overrides)
+            if due is None:
+                print("[Daemon] Nothing scheduled in the next 31 days.")
+                time.sleep(HEALTH_INTERVAL_SECONDS)
+                continue
+            if announced != (due, action):
+                print(f"[Daemon] Next: {action} at {due.isoformat()} (in {(due - now).total_seconds() / 60:.1f} min)")
+                announced = (due, action)
+
+            wait_seconds = (due - now).total_seconds()
+            if wait_seconds > PREPARE_SECONDS:
+                time.sleep(min(wait_seconds - PREPARE_SECONDS, HEALTH_INTERVAL_SECONDS))
+                if time.monotonic() - last_health >= HEALTH_INTERVAL_SECONDS:
+                    warm.ensure_healthy()
+                    last_health = time.monotonic()
+                continue
+
+            if punch_journal.check(email, action, due.date())[0] == "already_done":
+                # A restart inside the catch-up window must not punch twice
+                print(f"[Daemon] {action} already in the punch journal for {due.date()}. Skipping.")
+                fired.add((due.date(), action))
+                continue
+
+            # Stage: make sure Chromium is alive and the dashboard is fresh before the minute
+            metrics = run_metrics.RunMetrics(action, mode="daemon")
+            engine = retry_policy.RetryEngine(due.timestamp() + retry_policy.DEADLINE_MINUTES * 60, metrics)
+            try:
+                warm.ensure_healthy()
+                warm.session.metrics = metrics
+                engine.run("refresh", warm.session.refresh, warm.session.recover_for_action, get_page=lambda: warm.page)
+            except Exception as e:
+                warm.restart(f"staging failed ({e})")
+            last_health = time.monotonic()
+
+            remaining = (due - datetime.now(tz)).total_seconds()
+            if remaining > 0:
+                time.sleep(remaining)
+
+            fire_skew = (datetime.now(tz) - due).total_seconds()
+            fire_started = time.perf_counter()
+            metrics.extra["fire_skew_seconds"] = round(fire_skew, 3)
+            try:
+                warm.session.metrics = metrics
+                outcome = warm.session.run_action(action, dry_run, engine)
+                warm.rotate_trace()
+            except bixpe_bot.ActionError as e:
+                outcome = f"FAILED ({e})"
+                warm.rotate_trace(f"trace_{action}")
+            except Exception as e:
+                outcome = f"FAILED ({e})"
+                warm.restart(f"browser error during {action}", trace_name=f"trace_{action}")
+            warm.policy.report()
+            metrics.record(outcome.split(" ")[0])
+            # The warm page's events since the previous punch: full dump only if this one failed
+            event_log.finish(outcome.startswith("FAILED"), name=f"events_{action}")
+            if not dry_run:
+                punch_journal.record(email, action, outcome, metrics.extra.get("dashboard_state"),
+                                     latency_seconds=time.perf_counter() - fire_started, mode="daemon")
+            print(f"[Daemon] {action} -> {outcome} | scheduled {due:%H:%M:%S}, "
+                  f"fired +{fire_skew:.2f}s, "
+                  f"click-to-result {time.perf_counter() - fire_started:.2f}s")
+            fired.add((due.date(), action))
+    except KeyboardInterrupt:
+        print("[Daemon] Stopping.")
+    finally:
+        warm.stop()
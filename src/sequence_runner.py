@@ -0,0 +1,161 @@
+import re
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import bixpe_bot
+import calendar_plan
+import event_log
+import preflight
+import punch_journal
+import resource_policy
+import retry_policy
+import run_metrics
+
+OK_STATUSES = ("DONE", "SIMULATED", "ALREADY_DONE")
+STEP_PATTERN = re.compile(r"^(START|PAUSE|RESUME|END)(?:@(\d{1,2}:\d{2})|\+(\d+(?:\.\d+)?))?$")
+
+
+def parse_sequence(spec, default_delay=0.0):
+    """"START,PAUSE+5,RESUME@15:00,END" -> [{"action", "at", "delay"}].
+
+    ACTION@HH:MM waits for that time today (schedule.json timezone); ACTION+N waits N seconds
+    after the previous step; a bare ACTION waits default_delay (the first step never waits).
+    Raises ValueError on malformed steps.
+    """
+    steps = []
+    for item in (part.strip().upper() for part in spec.split(",")):
+        if not item:
+            continue
+        match = STEP_PATTERN.match(item)
+        if not match:
+            raise ValueError(f"Invalid sequence step '{item}' (expected ACTION, ACTION+SECONDS or ACTION@HH:MM)")
+        action, at, delay = match.groups()
+        if at:
+            hour, minute = (int(part) for part in at.split(":"))
+            if hour > 23 or minute > 59:
+                raise ValueError(f"Invalid time in sequence step '{item}'")
+            at = f"{hour:02d}:{minute:02d}"
+        steps.append({"action": action, "at": at,
+                      "delay": float(delay) if delay else (default_delay if steps and not at else 0.0)})
+    if not steps:
+        raise ValueError("Empty sequence")
+    return steps
+
+
+def scheduled_steps(steps, schedule_config, holidays, overrides, force=False):
+    """Applies the preflight schedule check to every step. Returns (steps to run, decision).
+
+    Without force, steps whose action is not scheduled today are dropped (e.g. PAUSE/RESUME
+    on a day without a break); weekends, holidays and days off skip the whole sequence.
+    decision is the first runnable step's preflight decision (the first step's if none runs).
+    """
+    decisions = [preflight.evaluate(step["action"], schedule_config, holidays, overrides, force=force)
+                 for step in steps]
+    kept = [step for step, decision in zip(steps, decisions) if decision["run"]]
+    if kept:
+        for step, decision in zip(steps, decisions):
+            if not decision["run"]:
+                print(f"[Sequence] Dropping {step['action']}: {decision['reason']}")
+    return kept, next((d for d in decisions if d["run"]), decisions[0])
+
+
+def wait_for_step(step, tz):
+    if step["at"]:
+        hour, minute = (int(part) for part in step["at"].split(":"))
+        now = datetime.now(tz)
+        target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        wait = (target - now).total_seconds()
+        if wait > 0:
+            print(f"[Sequence] Waiting until {step['at']} for {step['action']} ({wait / 60:.1f} min).")
+            time.sleep(wait)
+        elif wait < -60:
+            print(f"[Sequence] {step['action']} is {-wait / 60:.1f} min past {step['at']}; running now.")
+    elif step["delay"]:
+        print(f"[Sequence] Waiting {step['delay']:.0f}s before {step['action']}.")
+        time.sleep(step["delay"])
+
+
+def run_sequence(email, password, steps, headless=True, dry_run=False, use_session_cache=True,
+                 resource_preset=None, use_journal=True, timezone_name=calendar_plan.DEFAULT_TIMEZONE):
+    """Runs every step on one browser and one login. Returns one result dict per step.
+
+    The dashboard is reloaded between steps; the first failed step stops the rest.
+    """
+    from playwright.sync_api import sync_playwright
+    tz = ZoneInfo(timezone_name)
+    started = time.perf_counter()
+    results = [{"step": i + 1, "action": s["action"], "at": s["at"], "status": "SKIPPED", "started": None,
+                "seconds": None, "detail": ""} for i, s in enumerate(steps)]
+
+    setup = run_metrics.RunMetrics("SEQUENCE", mode="sequence")
+    event_log.SINK.reset()
+    p = sync_playwright().start()
+    policy = resource_policy.load_policy(resource_preset, warm=True)
+    session = bixpe_bot.BixpeSession(p, email, password, setup, headless=headless,
+                                     use_session_cache=use_session_cache, policy=policy)
+    try:
+        try:
+            session.open_browser()
+            engine = retry_policy.RetryEngine(time.time() + retry_policy.DEADLINE_MINUTES * 60, setup)
+            engine.run("login", session.auth, session.recover, get_page=lambda: session.page)
+            setup.record("READY")
+        except Exception as e:
+            print(f"[Sequence] Could not open an authenticated session: {e}")
+            setup.record("LOGIN_FAILED")
+            for result in results:
+                result.update(status="LOGIN_FAILED", detail=str(e).splitlines()[0])
+            return results
+
+        failed = None
+        for i, (step, result) in enumerate(zip(steps, results)):
+            action = step["action"]
+            if failed:
+                result["detail"] = f"step {failed} failed"
+                continue
+            wait_for_step(step, tz)
+            result["started"] = datetime.now(tz).strftime("%H:%M:%S")
+
+            if use_journal and not dry_run:
+                verdict, state = punch_journal.check(email, action, datetime.now(tz).date())
+                if verdict == "already_done":
+                    result.update(status="ALREADY_DONE", seconds=0.0, detail="already in the punch journal")
+                    continue
+
+            metrics = run_metrics.RunMetrics(action, mode="sequence")
+            session.metrics = metrics
+            deadline = (retry_policy.deadline_for(step["at"], timezone_name) if step["at"]
+                        else time.time() + retry_policy.DEADLINE_MINUTES * 60)
+            engine = retry_policy.RetryEngine(deadline, metrics)
+            step_started = time.perf_counter()
+            try:
+                if i > 0:
+                    # Fresh dashboard state after the previous punch (re-logs in if the session expired)
+                    engine.run("refresh", session.refresh, session.recover_for_action, get_page=lambda: session.page)
+                outcome = session.run_action(action, dry_run, engine)
+            except Exception as e:
+                outcome = "ACTION_FAILED"
+                result["detail"] = str(e).splitlines()[0]
+                failed = i + 1
+            result.update(status=outcome, seconds=time.perf_counter() - step_started)
+            metrics.record(outcome)
+            if not dry_run:
+                punch_journal.record(email, action, outcome, metrics.extra.get("dashboard_state"),
+                                     latency_seconds=result["seconds"], mode="sequence")
+        return results
+    finally:
+        policy.report()
+        failed_steps = [r for r in results if r["status"] not in OK_STATUSES + ("SKIPPED",)]
+        session.close(trace_name="trace_sequence" if failed_steps else None)
+        event_log.finish(bool(failed_steps), name="events_sequence")
+        p.stop()
+        print_results(results, time.perf_counter() - started)
+
+
+def print_results(results, total_seconds):
+    print(f"\n=== Sequence results ({total_seconds:.1f}s total, one browser, one login) ===")
+    print(f"{'Step':<5} {'Action':<7} {'Status':<13} {'At':<6} {'Started':<9} {'Latency':>8}  Details")
+    for r in results:
+        latency = f"{r['seconds']:.1f}s" if r["seconds"] is not None else "-"
+        print(f"{r['step']:<5} {r['action']:<7} {r['status']:<13} {r['at'] or '-':<6} {r['started'] or '-':<9} "
+              f"{latency:>8}  {r['detail']}")
@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import hashlib
+
+# Cached sessions live outside the repo tree's tracked files (see .gitignore).
+# They contain live authentication cookies: never commit or upload them.
+CACHE_DIR = os.environ.get(
+    "BIXPE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".bixpe_cache")
+)
+DEFAULT_TTL_HOURS = float(os.environ.get("BIXPE_SESSION_TTL_HOURS", "12"))
+
+
+def account_key(email):
+    """Stable, non-reversible file key for an account."""
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:16]
+
+
+def session_path(email, cache_dir=None):
+    """Path of the Playwright storage_state file for this account."""
+    cache_dir = cache_dir or CACHE_DIR
+    return os.path.join(cache_dir, f"session_{account_key(email)}.json")
+
+
+def _meta_path(email, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    return os.path.join(cache_dir, f"session_{account_key(email)}.meta.json")
+
+
+def load_session_meta(email, cache_dir=None):
+    """Returns the sidecar metadata ({saved_at, login_seconds}) or {}."""
+    try:
+        with open(_meta_path(email, cache_dir), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def load_session(email, ttl_hours=DEFAULT_TTL_HOURS, cache_dir=None):
+    """Returns the storage_state path if a fresh cached session exists, else None.
+
+    Sessions older than ttl_hours are deleted so the next login rewrites them.
+    """
+    path = session_path(email, cache_dir)
+    if not os.path.exists(path):
+        return None
+
+    saved_at = load_session_meta(email, cache_dir).get("saved_at") or os.path.getmtime(path)
+    age_hours = (time.time() - saved_at) / 3600
+    if age_hours > ttl_hours:
+        print(f"Session cache expired ({age_hours:.1f}h > {ttl_hours}h TTL). Discarding.")
+        invalidate_session(email, cache_dir)
+        return None
+
+    print(f"Using cached session ({age_hours:.1f}h old).")
+    return path
+
+
+def save_session(context, email, login_seconds=None, cache_dir=None):
+    """Persists cookies + localStorage of an authenticated (sync API) context."""
+    return write_session(email, context.storage_state(), login_seconds, cache_dir)
+
+
+def write_session(email, storage_state, login_seconds=None, cache_dir=None):
+    """Writes an already-captured storage_state dict (works for sync and async contexts)."""
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    path = session_path(email, cache_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(storage_state, f)
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, path)  # Atomic: a crashed run never leaves a half-written state
+
+    with open(_meta_path(email, cache_dir), "w") as f:
+        json.dump({"saved_at": time.time(), "login_seconds": login_seconds}, f)
+    print(f"Session cached for next runs: {path}")
+    return path
+
+
+def invalidate_session(email, cache_dir=None):
+    """Removes the cached session (e.g. after the server rejected it)."""
+    for path in (session_path(email, cache_dir), _meta_path(email, cache_dir)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,33 @@
+import os
+
+import artifacts
+
+
+def make_files(directory, sizes):
+    """One file per size, the first one oldest. Returns their paths."""
+    paths = []
+    for i, size in enumerate(sizes):
+        path = directory / f"shot_{i}.jpg"
+        path.write_bytes(b"x" * size)
+        os.utime(path, (1_700_000_000 + i, 1_700_000_000 + i))
+        paths.append(str(path))
+    return paths
+
+
+def test_count_limit_deletes_the_oldest_first(tmp_path):
+    paths = make_files(tmp_path, [10] * 5)
+    assert artifacts.enforce_retention(str(tmp_path), max_files=3, max_bytes=10_000) == paths[:2]
+    assert sorted(os.listdir(tmp_path)) == ["shot_2.jpg", "shot_3.jpg", "shot_4.jpg"]
+
+
+def test_byte_limit_deletes_the_oldest_first(tmp_path):
+    paths = make_files(tmp_path, [400, 300, 200, 100])
+    assert artifacts.enforce_retention(str(tmp_path), max_files=10, max_bytes=350) == paths[:2]
+    assert sorted(os.listdir(tmp_path)) == ["shot_2.jpg", "shot_3.jpg"]
+
+
+def test_within_limits_nothing_is_deleted_and_subdirectories_are_kept(tmp_path):
+    make_files(tmp_path, [10, 10])
+    (tmp_path / "traces").mkdir()
+    assert artifacts.enforce_retention(str(tmp_path), max_files=2, max_bytes=20) == []
+    assert len(os.listdir(tmp_path)) == 3
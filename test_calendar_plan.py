@@ -0,0 +1,60 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import calendar_plan
+
+SCHEDULE = {
+    "mon_thu": {"start": "08:30", "break_start": "14:00", "break_end": "15:00", "end": "18:00"},
+    "friday": {"start": "08:00", "break_start": None, "break_end": None, "end": "14:00"},
+    "timezone": "Europe/Madrid",
+}
+HOLIDAYS = ["2026-12-08"]
+OVERRIDES = {
+    "2026-12-24": {"break_start": None, "break_end": None, "end": "14:00"},
+    "2026-11-05": {"start": "09:15"},
+    "2026-12-31": "off",
+}
+TZ = ZoneInfo("Europe/Madrid")
+
+
+def test_day_times_weekday_and_friday():
+    assert calendar_plan.day_times(SCHEDULE, HOLIDAYS, {}, date(2026, 11, 4)) == {
+        "START": "08:30", "PAUSE": "14:00", "RESUME": "15:00", "END": "18:00"}
+    assert calendar_plan.day_times(SCHEDULE, HOLIDAYS, {}, date(2026, 10, 16)) == {"START": "08:00", "END": "14:00"}
+
+
+def test_day_times_weekend_holiday_and_off_day():
+    assert calendar_plan.day_times(SCHEDULE, HOLIDAYS, OVERRIDES, date(2026, 10, 17)) is None
+    assert calendar_plan.day_times(SCHEDULE, HOLIDAYS, OVERRIDES, date(2026, 12, 8)) is None
+    assert calendar_plan.day_times(SCHEDULE, HOLIDAYS, OVERRIDES, date(2026, 12, 31)) is None
+
+
+def test_day_times_overrides_replace_and_remove_keys():
+    assert calendar_plan.day_times(SCHEDULE, HOLIDAYS, OVERRIDES, date(2026, 11, 5)) == {
+        "START": "09:15", "PAUSE": "14:00", "RESUME": "15:00", "END": "18:00"}
+    assert calendar_plan.day_times(SCHEDULE, HOLIDAYS, OVERRIDES, date(2026, 12, 24)) == {
+        "START": "08:30", "END": "14:00"}
+
+
+def test_next_event_within_a_day_and_across_skipped_days():
+    plan = calendar_plan.compile_plan(SCHEDULE, HOLIDAYS, OVERRIDES, date(2026, 12, 24), date(2027, 1, 8))
+    assert plan.next_event(datetime(2026, 12, 24, 10, 0, tzinfo=TZ)) == (datetime(2026, 12, 24, 14, 0, tzinfo=TZ), "END")
+    # Fri 25 is not a holiday here: its START is next
+    assert plan.next_event(datetime(2026, 12, 24, 14, 0, tzinfo=TZ)) == (datetime(2026, 12, 25, 8, 0, tzinfo=TZ), "START")
+    # 31 is off: after Wed 30 END comes Fri 1 START
+    assert plan.next_event(datetime(2026, 12, 30, 18, 0, tzinfo=TZ)) == (datetime(2027, 1, 1, 8, 0, tzinfo=TZ), "START")
+    assert plan.next_event(datetime(2026, 12, 30, 18, 0, tzinfo=TZ), inclusive=True)[1] == "END"
+
+
+def test_next_event_past_the_plan_is_empty():
+    plan = calendar_plan.compile_plan(SCHEDULE, HOLIDAYS, OVERRIDES, date(2026, 10, 16), date(2026, 10, 16))
+    assert len(plan) == 2
+    assert plan.next_event(datetime(2026, 10, 16, 14, 0, tzinfo=TZ)) == (None, None)
+
+
+def test_plan_times_are_local_across_dst_change():
+    # Europe/Madrid leaves summer time on 2026-10-25: 08:30 local is 06:30 UTC before, 07:30 UTC after
+    plan = calendar_plan.compile_plan(SCHEDULE, [], {}, date(2026, 10, 22), date(2026, 10, 26))
+    starts = [due for due, action in plan.events if action == "START"]
+    assert [due.utcoffset().total_seconds() / 3600 for due in starts] == [2, 2, 1]
+    assert all((due.hour, due.minute) in ((8, 30), (8, 0)) for due in starts)
@@ -0,0 +1,59 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import event_log
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen event_log clock; advance it with clock.now += seconds."""
+    fake = SimpleNamespace(now=1_700_000_000.0, strftime=time.strftime, localtime=time.localtime)
+    fake.time = lambda: fake.now
+    monkeypatch.setattr(event_log, "time", fake)
+    return fake
+
+
+def test_consecutive_repeats_collapse(clock):
+    sink = event_log.EventSink(capacity=10)
+    for _ in range(3):
+        sink.emit("console", "warning", "Slow network")
+    sink.emit("console", "warning", "Other")
+    sink.emit("console", "warning", "Slow network")
+    assert [(e["message"], e["repeat"]) for e in sink.events] == [("Slow network", 3), ("Other", 1), ("Slow network", 1)]
+    assert sink.collapsed == 2
+    assert sink.counts[("console", "warning")] == 5
+
+
+def test_each_source_is_rate_limited_after_the_burst(clock):
+    sink = event_log.EventSink(capacity=1000)
+    for i in range(event_log.RATE_BURST + 5):
+        sink.emit("console", "info", f"message {i}")
+    assert len(sink.events) == event_log.RATE_BURST
+    assert sink.dropped == 5
+    # Other sources have their own bucket
+    sink.emit("bot", "info", "still logged")
+    assert sink.events[-1]["source"] == "bot"
+    # One second refills RATE_PER_SECOND tokens
+    clock.now += 1
+    for i in range(event_log.RATE_PER_SECOND + 1):
+        sink.emit("console", "info", f"later {i}")
+    assert sink.dropped == 6
+
+
+def test_errors_are_never_dropped(clock):
+    sink = event_log.EventSink(capacity=1000)
+    for i in range(event_log.RATE_BURST):
+        sink.emit("console", "info", f"noise {i}")
+    for i in range(20):
+        sink.emit("console", "error", f"failure {i}")
+    assert sink.dropped == 0
+    assert [e["message"] for e in sink.events if e["level"] == "error"] == [f"failure {i}" for i in range(20)]
+
+
+def test_the_buffer_keeps_the_newest_events(clock):
+    sink = event_log.EventSink(capacity=3)
+    for i in range(5):
+        sink.emit("bot", "info", f"step {i}")
+    assert [e["message"] for e in sink.events] == ["step 2", "step 3", "step 4"]
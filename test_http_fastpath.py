@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+import http_fastpath
+import mock_bixpe
+
+EMAIL = "fast@example.com"
+PASSWORD = "secret"
+
+# What --record-http stores for the mock's login form and START XHR
+RECIPE = {
+    "login": [{
+        "page": "/",
+        "method": "POST",
+        "path": "/Account/Login",
+        "headers": {"content-type": "application/x-www-form-urlencoded"},
+        "body": {"form": [["__RequestVerificationToken", "{{token}}"], ["Username", "{{email}}"],
+                          ["Password", "{{password}}"]]},
+        "success": {"status": 302, "location": "/"},
+    }],
+    "actions": {"START": [{
+        "page": "/",
+        "method": "POST",
+        "path": "/api/workday/start",
+        "headers": {"content-type": "application/json", "x-requested-with": "XMLHttpRequest",
+                    "RequestVerificationToken": "{{token}}"},
+        "body": {"json": {}},
+        "success": {"status": 200, "json_keys": ["state", "success"], "json_flags": {"success": True}},
+    }]},
+}
+
+
+@pytest.fixture
+def mock_server():
+    server, base_url, state = mock_bixpe.start_server(mock_bixpe.MockConfig(render_ms=0, overlay_ms=0))
+    yield base_url, state
+    server.shutdown()
+
+
+@pytest.fixture
+def recipe_path(isolated_files, mock_server):
+    path = isolated_files / "http_recipe.json"
+    path.write_text(json.dumps(dict(RECIPE, base_url=mock_server[0])))
+    return str(path)
+
+
+def test_replay_punches_against_the_mock(recipe_path, mock_server):
+    result = http_fastpath.run_fast_path(EMAIL, PASSWORD, "START", recipe_path=recipe_path)
+    assert result["status"] == "DONE"
+    assert mock_server[1].workday[EMAIL] == "WORKING"
+
+
+def test_shape_mismatch_raises(recipe_path, mock_server):
+    http_fastpath.run_fast_path(EMAIL, PASSWORD, "START", recipe_path=recipe_path)
+    # Already WORKING: the mock answers 409 instead of the recorded 200
+    with pytest.raises(http_fastpath.FastPathError, match="409"):
+        http_fastpath.run_fast_path(EMAIL, PASSWORD, "START", recipe_path=recipe_path)
+
+
+def test_wrong_password_fails_the_login_step(recipe_path, mock_server):
+    with pytest.raises(http_fastpath.FastPathError, match="/Account/Login"):
+        http_fastpath.run_fast_path(EMAIL, "", "START", recipe_path=recipe_path)
+    assert EMAIL not in mock_server[1].workday
+
+
+def test_simulation_sends_no_punch(recipe_path, mock_server):
+    result = http_fastpath.run_fast_path(EMAIL, PASSWORD, "START", dry_run=True, recipe_path=recipe_path)
+    assert result["status"] == "SIMULATED"
+    assert mock_server[1].punches == []
+
+
+def test_missing_recipe_raises(isolated_files):
+    with pytest.raises(http_fastpath.FastPathError, match="No recorded requests"):
+        http_fastpath.run_fast_path(EMAIL, PASSWORD, "PAUSE", recipe_path=str(isolated_files / "none.json"))
+
+
+def test_extract_token_reads_hidden_input_and_meta():
+    assert http_fastpath.extract_token('<input type="hidden" name="__RequestVerificationToken" value="abc">') == "abc"
+    assert http_fastpath.extract_token('<meta name="csrf-token" content="xyz">') == "xyz"
+    assert http_fastpath.extract_token("<p>no token</p>") is None
+
+
+class FakeRequest:
+    def __init__(self, post_data, content_type):
+        self.post_data = post_data
+        self.headers = {"content-type": content_type}
+
+
+def test_credentials_are_templated_in_nested_json_and_raw_bodies():
+    nested = json.dumps({"auth": {"user": EMAIL, "pass": PASSWORD}, "list": [f"x{PASSWORD}y"]})
+    body = http_fastpath._template_body(FakeRequest(nested, "application/json"), EMAIL, PASSWORD)
+    assert body == {"json": {"auth": {"user": "{{email}}", "pass": "{{password}}"}, "list": ["x{{password}}y"]}}
+    raw = f"user={EMAIL.replace('@', '%40')}&pass={PASSWORD}"
+    body = http_fastpath._template_body(FakeRequest(raw, "text/plain"), EMAIL, PASSWORD)
+    assert body == {"raw": "user={{email_url}}&pass={{password}}"}
+    assert not http_fastpath.leaks_credentials({"login": [{"body": body}]}, EMAIL, PASSWORD)
+
+
+def test_a_surviving_password_is_detected():
+    assert http_fastpath.leaks_credentials({"login": [{"path": f"/login?p={PASSWORD}"}]}, EMAIL, PASSWORD)
@@ -0,0 +1,66 @@
+import punch_journal
+
+EMAIL = "journal@example.com"
+
+
+def actions(*names):
+    return [{"action": name} for name in names]
+
+
+def test_replay_follows_the_workday_state_machine():
+    assert punch_journal.replay([]) == "NOT_STARTED"
+    assert punch_journal.replay(actions("START")) == "WORKING"
+    assert punch_journal.replay(actions("START", "PAUSE")) == "PAUSED"
+    assert punch_journal.replay(actions("START", "PAUSE", "RESUME")) == "WORKING"
+    assert punch_journal.replay(actions("START", "PAUSE", "RESUME", "END")) == "ENDED"
+
+
+def test_check_verdicts(isolated_files):
+    today = punch_journal.today()
+    assert punch_journal.check(EMAIL, "START", today) == ("unknown", "NOT_STARTED")
+    punch_journal.record(EMAIL, "START", "DONE", "NOT_STARTED")
+    assert punch_journal.check(EMAIL, "START", today) == ("already_done", "WORKING")
+    assert punch_journal.check(EMAIL, "PAUSE", today) == ("ok", "WORKING")
+    assert punch_journal.check(EMAIL, "RESUME", today) == ("invalid", "WORKING")
+    punch_journal.record(EMAIL, "PAUSE", "DONE", "WORKING")
+    assert punch_journal.check(EMAIL, "RESUME", today) == ("ok", "PAUSED")
+    assert punch_journal.check(EMAIL, "END", today) == ("invalid", "PAUSED")
+
+
+def test_check_is_per_account(isolated_files):
+    punch_journal.record(EMAIL, "START", "DONE", "NOT_STARTED")
+    assert punch_journal.check("other@example.com", "START", punch_journal.today())[0] == "unknown"
+
+
+def test_failed_and_simulated_outcomes_are_not_recorded(isolated_files):
+    assert punch_journal.record(EMAIL, "START", "SIMULATED", "NOT_STARTED") is None
+    assert punch_journal.record(EMAIL, "START", "ACTION_FAILED", "NOT_STARTED") is None
+    assert punch_journal.load_entries() == []
+
+
+def test_hidden_button_before_start_is_not_already_done(isolated_files):
+    # A failed START leaves the dashboard NOT_STARTED: the PAUSE trigger sees its button hidden
+    assert punch_journal.record(EMAIL, "PAUSE", "ALREADY_DONE", "NOT_STARTED") is None
+    assert punch_journal.check(EMAIL, "START", punch_journal.today()) == ("unknown", "NOT_STARTED")
+
+
+def test_already_done_needs_a_state_the_action_leads_to(isolated_files):
+    assert punch_journal.record(EMAIL, "START", "ALREADY_DONE", "WORKING")["action"] == "START"
+    # WORKING without a journaled PAUSE may just be before the break
+    assert punch_journal.record(EMAIL, "RESUME", "ALREADY_DONE", "WORKING") is None
+    assert punch_journal.record(EMAIL, "PAUSE", "ALREADY_DONE", "PAUSED")["action"] == "PAUSE"
+    assert punch_journal.record(EMAIL, "RESUME", "ALREADY_DONE", "WORKING")["action"] == "RESUME"
+    # After END Bixpe offers START again
+    assert punch_journal.record(EMAIL, "END", "ALREADY_DONE", "NOT_STARTED")["action"] == "END"
+    assert punch_journal.check(EMAIL, "END", punch_journal.today()) == ("already_done", "ENDED")
+
+
+def test_end_on_a_fresh_dashboard_is_not_already_done(isolated_files):
+    assert punch_journal.record(EMAIL, "END", "ALREADY_DONE", "NOT_STARTED") is None
+    assert punch_journal.record(EMAIL, "START", "ALREADY_DONE", None) is None
+
+
+def test_each_action_is_recorded_once_per_day(isolated_files):
+    assert punch_journal.record(EMAIL, "START", "DONE", "NOT_STARTED") is not None
+    assert punch_journal.record(EMAIL, "START", "ALREADY_DONE", "WORKING") is None
+    assert len(punch_journal.load_entries()) == 1
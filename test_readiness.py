@@ -0,0 +1,41 @@
+import readiness
+
+HOST = "worktime.bixpe.com"
+
+
+class FakeRequest:
+    def __init__(self, url, method="POST", resource_type="xhr", start_ms=None):
+        self.url = url
+        self.method = method
+        self.resource_type = resource_type
+        self.timing = {"startTime": start_ms if start_ms is not None else -1}
+
+
+class FakeResponse:
+    def __init__(self, url, **kwargs):
+        self.url = url
+        self.request = FakeRequest(url, **kwargs)
+
+
+def is_clock(url, **kwargs):
+    return readiness.is_clock_response(FakeResponse(url, **kwargs), HOST)
+
+
+def test_clock_endpoints_match_on_the_path():
+    assert is_clock("https://worktime.bixpe.com/api/workday/start")
+    assert is_clock("https://worktime.bixpe.com/Fichaje/Registrar")
+
+
+def test_the_worktime_host_alone_does_not_match():
+    assert not is_clock("https://worktime.bixpe.com/Notifications/MarkRead")
+    assert not is_clock("https://worktime.bixpe.com/Session/Start")
+
+
+def test_gets_documents_and_other_hosts_are_ignored():
+    assert not is_clock("https://worktime.bixpe.com/api/workday/start", method="GET")
+    assert not is_clock("https://worktime.bixpe.com/api/workday/start", resource_type="document")
+    assert not is_clock("https://analytics.example.com/api/workday/start")
+
+
+def test_request_start_comes_from_playwright_timing():
+    assert readiness.request_started_at(FakeResponse("https://x/", start_ms=1_700_000_000_500)) == 1_700_000_000.5
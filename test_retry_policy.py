@@ -0,0 +1,65 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import bixpe_bot
+import retry_policy
+
+
+# Same class name as Playwright's, which classify() recognizes by name
+PlaywrightTimeout = type("TimeoutError", (Exception,), {})
+
+
+class FakePage:
+    def __init__(self, login_form=False, closed=False):
+        self.login_form = login_form
+        self.closed = closed
+
+    def is_visible(self, selector):
+        if self.closed:
+            raise Exception("Target page, context or browser has been closed")
+        return self.login_form
+
+
+def test_crash_markers_win():
+    assert retry_policy.classify(Exception("Browser closed unexpectedly"), FakePage(login_form=True)) == \
+        retry_policy.BROWSER_CRASHED
+
+
+def test_unusable_page_means_crashed_browser():
+    assert retry_policy.classify(Exception("boom"), FakePage(closed=True)) == retry_policy.BROWSER_CRASHED
+
+
+def test_login_form_means_expired_session():
+    error = bixpe_bot.ActionError("Target button for START not found", kind=retry_policy.SELECTOR_MISS)
+    assert retry_policy.classify(error, FakePage(login_form=True)) == retry_policy.SESSION_EXPIRED
+
+
+def test_kind_from_the_raise_site():
+    error = bixpe_bot.ActionError("Punch for END could not be confirmed", kind=retry_policy.UNCONFIRMED)
+    assert retry_policy.classify(error, FakePage()) == retry_policy.UNCONFIRMED
+    error = bixpe_bot.ActionError("'#processing-text' never cleared", kind=retry_policy.OVERLAY_STUCK)
+    assert retry_policy.classify(error) == retry_policy.OVERLAY_STUCK
+
+
+def test_network_errors_and_timeouts():
+    assert retry_policy.classify(Exception("page.goto: net::ERR_CONNECTION_REFUSED")) == retry_policy.TRANSIENT_NETWORK
+    assert retry_policy.classify(Exception("HTTP 503 Service Unavailable")) == retry_policy.TRANSIENT_NETWORK
+    assert retry_policy.classify(PlaywrightTimeout("Timeout 30000ms exceeded")) == retry_policy.TRANSIENT_NETWORK
+
+
+def test_selector_miss_and_unknown():
+    assert retry_policy.classify(Exception("Email field not found. Checked: #emailLogin")) == retry_policy.SELECTOR_MISS
+    assert retry_policy.classify(ValueError("something else")) == retry_policy.UNKNOWN
+
+
+def test_deadline_counts_from_the_scheduled_time():
+    tz = ZoneInfo("Europe/Madrid")
+    now = datetime(2026, 10, 16, 8, 3, tzinfo=tz)
+    deadline = retry_policy.deadline_for("08:00", "Europe/Madrid", minutes=15, now=now)
+    assert deadline == datetime(2026, 10, 16, 8, 15, tzinfo=tz).timestamp()
+    # Forced run without a schedule: the budget starts now
+    assert retry_policy.deadline_for(None, "Europe/Madrid", minutes=15, now=now) == \
+        datetime(2026, 10, 16, 8, 18, tzinfo=tz).timestamp()
+    # A trigger later than the whole budget still gets one attempt
+    late = datetime(2026, 10, 16, 9, 0, tzinfo=tz)
+    assert retry_policy.deadline_for("08:00", "Europe/Madrid", minutes=15, now=late) == late.timestamp()
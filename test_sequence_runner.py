@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+
+import preflight
+import sequence_runner
+
+SCHEDULE = {
+    "mon_thu": {"start": "08:30", "break_start": "14:00", "break_end": "15:00", "end": "18:00"},
+    "friday": {"start": "08:00", "break_start": None, "break_end": None, "end": "14:00"},
+    "timezone": "Europe/Madrid",
+}
+
+
+def test_parse_plain_relative_and_timed_steps():
+    assert sequence_runner.parse_sequence("START,PAUSE+5,resume@9:05, END", default_delay=2) == [
+        {"action": "START", "at": None, "delay": 0.0},
+        {"action": "PAUSE", "at": None, "delay": 5.0},
+        {"action": "RESUME", "at": "09:05", "delay": 0.0},
+        {"action": "END", "at": None, "delay": 2},
+    ]
+
+
+def test_first_step_never_waits_the_default_delay():
+    assert sequence_runner.parse_sequence("END", default_delay=30)[0]["delay"] == 0.0
+    assert sequence_runner.parse_sequence("START+1.5")[0]["delay"] == 1.5
+
+
+def test_empty_items_are_ignored():
+    assert [s["action"] for s in sequence_runner.parse_sequence("START,,END,")] == ["START", "END"]
+
+
+@pytest.mark.parametrize("spec", ["", " , ", "START,LUNCH", "START+x", "PAUSE@25:00", "PAUSE@14:60", "END@1400"])
+def test_malformed_sequences_raise(spec):
+    with pytest.raises(ValueError):
+        sequence_runner.parse_sequence(spec)
+
+
+def test_unscheduled_steps_are_dropped_unless_forced(monkeypatch):
+    steps = sequence_runner.parse_sequence("START,PAUSE,RESUME,END")
+    monkeypatch.setattr(preflight, "today_in", lambda config: date(2026, 10, 16))  # Friday: no break
+    kept, decision = sequence_runner.scheduled_steps(steps, SCHEDULE, [], {})
+    assert [s["action"] for s in kept] == ["START", "END"] and decision["run"]
+    kept, _ = sequence_runner.scheduled_steps(steps, SCHEDULE, [], {}, force=True)
+    assert len(kept) == 4
+    monkeypatch.setattr(preflight, "today_in", lambda config: date(2026, 10, 17))  # Saturday
+    kept, decision = sequence_runner.scheduled_steps(steps, SCHEDULE, [], {}, force=True)
+    assert kept == [] and not decision["run"]
@@ -0,0 +1,49 @@
+import json
+import os
+import stat
+import time
+from types import SimpleNamespace
+
+import session_cache
+
+EMAIL = "cache@example.com"
+STATE = {"cookies": [{"name": "auth", "value": "abc"}], "origins": []}
+
+
+def test_fresh_session_is_reused(isolated_files):
+    path = session_cache.write_session(EMAIL, STATE, login_seconds=4.2)
+    assert session_cache.load_session(EMAIL) == path
+    with open(path) as f:
+        assert json.load(f) == STATE
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert session_cache.load_session_meta(EMAIL)["login_seconds"] == 4.2
+    # Keyed per account, case-insensitively
+    assert session_cache.load_session(" CACHE@example.com ") == path
+    assert session_cache.load_session("other@example.com") is None
+
+
+def test_expired_session_is_discarded(isolated_files, monkeypatch):
+    path = session_cache.write_session(EMAIL, STATE)
+    now = time.time()
+    monkeypatch.setattr(session_cache, "time", SimpleNamespace(time=lambda: now + 13 * 3600))
+    assert session_cache.load_session(EMAIL, ttl_hours=12) is None
+    assert not os.path.exists(path)
+    assert session_cache.load_session_meta(EMAIL) == {}
+
+
+def test_ttl_falls_back_to_the_file_age_without_metadata(isolated_files):
+    path = session_cache.write_session(EMAIL, STATE)
+    os.remove(session_cache._meta_path(EMAIL))
+    old = time.time() - 2 * 3600
+    os.utime(path, (old, old))
+    assert session_cache.load_session(EMAIL, ttl_hours=3) == path
+    assert session_cache.load_session(EMAIL, ttl_hours=1) is None
+
+
+def test_invalidate_removes_state_and_metadata(isolated_files):
+    path = session_cache.write_session(EMAIL, STATE)
+    session_cache.invalidate_session(EMAIL)
+    assert not os.path.exists(path)
+    assert not os.path.exists(session_cache._meta_path(EMAIL))
+    assert session_cache.load_session(EMAIL) is None
+    session_cache.invalidate_session(EMAIL)  # Nothing cached: no error